@@ -0,0 +1,52 @@
+"""Benchmark POST /allocate on payroll splits of growing size
+
+Usage: python benchmarks/bench_allocate.py [--targets 100 1000 10000] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from allocator import allocate  # noqa: E402
+from main import app  # noqa: E402
+from models import AllocationRequest  # noqa: E402
+from synthetic import synthetic_allocation  # noqa: E402
+
+
+def median_ms(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--debts', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    print('{:>8} {:>12} {:>12} {:>14}'.format('targets', 'allocate ms', 'endpoint ms', 'allocated'))
+    for count in args.targets:
+        body = synthetic_allocation(count, args.debts, seed=args.seed)
+        parsed = AllocationRequest.parse(body)
+        result = allocate(parsed)
+        # Money is conserved to the cent
+        assert round(sum(item['amount'] for item in result['allocations']), 2) == result['summary']['total_allocated']
+        engine_ms = median_ms(lambda: allocate(parsed), args.runs)
+        endpoint_ms = median_ms(lambda: client.post('/allocate', json=body), args.runs)
+        print('{:>8} {:>12.2f} {:>12.2f} {:>14,.2f}'.format(
+            count + args.debts, engine_ms, endpoint_ms, result['summary']['total_allocated']
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark the optimal payoff strategy against the avalanche/snowball/equal heuristics
+
+Every strategy spends the same minimums plus available funds. The heuristics
+run as one batch, so they share a time. "optimal" honours the synthetic
+priority tiers; "optimal_flat" puts every debt in one tier, where it should
+match the avalanche.
+
+Usage: python benchmarks/bench_optimal.py [--debts 50 100 300] [--months 360] [--runs 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from main import planner  # noqa: E402
+from models import FinancialProfile  # noqa: E402
+from synthetic import synthetic_debts  # noqa: E402
+
+
+def time_call(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--debts', type=int, nargs='+', default=[10, 50, 100, 300])
+    parser.add_argument('--months', type=int, default=360)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print('{:>6} {:>14} {:>10} {:>8} {:>14}'.format('debts', 'strategy', 'ms', 'months', 'interest'))
+    for count in args.debts:
+        body = {'debts': synthetic_debts(count, rng)}
+        debts = FinancialProfile.parse(body).debts
+        flat_debts = FinancialProfile.parse({'debts': [dict(debt, priority='medium') for debt in body['debts']]}).debts
+        # Enough surplus on top of minimums to retire the debts well inside the horizon
+        available_funds = sum(debt.current_balance for debt in debts) / (args.months / 3)
+
+        heuristics, heuristic_ms = time_call(
+            lambda: planner.simulate_debt_payoff_batch([
+                ('avalanche', sorted(debts, key=lambda x: x.interest_rate, reverse=True), 'avalanche'),
+                ('snowball', sorted(debts, key=lambda x: x.current_balance), 'snowball'),
+                ('equal_payment', debts, 'equal')
+            ], available_funds, 'stepper', args.months),
+            args.runs
+        )
+        for name, result in heuristics.items():
+            print('{:>6} {:>14} {:>10.2f} {:>8} {:>14,.2f}'.format(
+                count, name, heuristic_ms, result['months_to_payoff'], result['total_interest']))
+        for name, tiered in (('optimal', debts), ('optimal_flat', flat_debts)):
+            optimal, optimal_ms = time_call(
+                lambda: planner.calculate_optimal_strategy(tiered, available_funds, args.months),
+                args.runs
+            )
+            print('{:>6} {:>14} {:>10.2f} {:>8} {:>14,.2f}{}'.format(
+                count, name, optimal_ms, optimal['months_to_payoff'], optimal['total_interest'],
+                ' (truncated)' if optimal['truncated'] else ''))
+
+
+if __name__ == '__main__':
+    main()
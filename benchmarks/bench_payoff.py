@@ -0,0 +1,79 @@
+"""Benchmark the payoff simulators on small and large profiles
+
+Times the reference stepper (simulate_debt_payoff, once per strategy), the
+NumPy stepper and the event-driven solver on the same avalanche, snowball
+and equal batch, and shows which one simulate_debt_payoff_batch picks.
+--scenarios repeats the batch rows, as a sweep or a batch of profiles would;
+that and a low --funds (long payoffs) are where the event solver wins.
+
+Usage: python benchmarks/bench_payoff.py [--debts 2 5 10 20 50 200] [--months 360] [--runs 20]
+                                         [--funds 0.02] [--scenarios 1]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import engine  # noqa: E402
+import main as server  # noqa: E402
+from main import planner  # noqa: E402
+from models import FinancialProfile  # noqa: E402
+from synthetic import synthetic_debts  # noqa: E402
+
+
+def time_call(func, runs):
+    func()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--debts', type=int, nargs='+', default=[2, 5, 10, 20, 50, 200])
+    parser.add_argument('--months', type=int, default=360)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--funds', type=float, default=0.02, help='Monthly funds above the minimums, as a share of total debt')
+    parser.add_argument('--scenarios', type=int, default=1, help='Copies of the three strategy rows per batch')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print('{:>6} {:>12} {:>12} {:>12}  {}'.format('debts', 'reference', 'stepper', 'events', 'batch uses'))
+    for count in args.debts:
+        debts = FinancialProfile.parse({'debts': synthetic_debts(count, rng)}).debts
+        available_funds = sum(debt.current_balance for debt in debts) * args.funds
+        orderings = [
+            ('avalanche', sorted(debts, key=lambda x: x.interest_rate, reverse=True), 'avalanche'),
+            ('snowball', sorted(debts, key=lambda x: x.current_balance), 'snowball'),
+            ('equal_payment', debts, 'equal')
+        ]
+        rows = orderings * args.scenarios
+        batch = (
+            [[debt.current_balance for debt in ordered] for _, ordered, _ in rows],
+            [[debt.interest_rate for debt in ordered] for _, ordered, _ in rows],
+            [[debt.minimum_payment for debt in ordered] for _, ordered, _ in rows],
+            [available_funds] * len(rows), args.months, [strategy != 'equal' for _, _, strategy in rows]
+        )
+
+        reference_ms = time_call(lambda: [
+            planner.simulate_debt_payoff(ordered, 0, available_funds, strategy, args.months)
+            for _, ordered, strategy in rows
+        ], args.runs)
+        stepper_ms = time_call(lambda: engine.simulate_payoff_batch(*batch), args.runs)
+        events_ms = time_call(lambda: engine.solve_payoff_events(*batch), args.runs)
+        print('{:>6} {:>12.2f} {:>12.2f} {:>12.2f}  {}'.format(
+            count, reference_ms, stepper_ms, events_ms,
+            'reference' if count <= server.SCALAR_PAYOFF_MAX_DEBTS else 'requested solver'
+        ))
+
+
+if __name__ == '__main__':
+    main()
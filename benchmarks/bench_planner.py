@@ -0,0 +1,245 @@
+"""Benchmark every ComprehensiveFinancialPlanner method and the /calculate-plan endpoint
+
+Usage: python benchmarks/bench_planner.py [--debts 5 50] [--horizon 12 120] [--runs 50]
+                                          [--output results.json] [--compare baseline.json]
+
+Each case reports throughput, p50/p99 latency and the tracemalloc peak of one
+extra call. --output saves the run as JSON; --compare diffs p50 latency against
+a saved run and exits non-zero when a case is slower by more than --threshold.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import main as server  # noqa: E402
+from models import FinancialProfile  # noqa: E402
+from plan_cache import SectionMemo  # noqa: E402
+from synthetic import synthetic_profile  # noqa: E402
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(int(math.ceil(percent / 100 * len(sorted_values))), 1)
+    return sorted_values[rank - 1]
+
+
+def measure(func, runs, setup=None):
+    """Time func over runs calls (setup runs untimed before each) and trace one more call's peak memory"""
+    timings = []
+    func()
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'runs': runs,
+        'throughput_per_s': round(runs / sum(timings), 2) if sum(timings) else None,
+        'mean_ms': round(statistics.mean(timings) * 1000, 4),
+        'p50_ms': round(percentile(timings, 50) * 1000, 4),
+        'p99_ms': round(percentile(timings, 99) * 1000, 4),
+        'peak_memory_kib': round(peak / 1024, 1)
+    }
+
+
+def reset_memo():
+    server.planner.section_memo = SectionMemo(server.SECTION_MEMO_SIZE, server.SECTION_MEMO_MAX_CELLS)
+
+
+def planner_cases(body):
+    """(name, func, setup) for every planner method, fed from one synthetic profile"""
+    planner = server.planner
+    profile = FinancialProfile.parse(body)
+    debts = profile.debts
+    totals = planner.calculate_totals(profile)
+    available = totals['available_funds']
+    expenses_total = totals['total_current_expenses']
+    health_score = planner.calculate_financial_health_score(
+        profile.monthly_income, profile.current_savings, totals['total_debt'], expenses_total,
+        profile.emergency_fund_target, available
+    )
+    horizon = profile.projection_months
+    base_projection = planner.project_months(
+        profile.monthly_income, profile.current_savings, debts, profile.expenses, profile.income_changes,
+        profile.emergency_fund_target, horizon
+    )
+    initial_debt = sum(debt.initial_balance for debt in debts)
+    orderings = [
+        ('avalanche', sorted(debts, key=lambda x: x.interest_rate, reverse=True), 'avalanche'),
+        ('snowball', sorted(debts, key=lambda x: x.current_balance), 'snowball'),
+        ('equal_payment', debts, 'equal')
+    ]
+
+    return [
+        ('calculate_comprehensive_plan[cold]', lambda: planner.calculate_comprehensive_plan(profile), reset_memo),
+        ('calculate_comprehensive_plan[memo]', lambda: planner.calculate_comprehensive_plan(profile), None),
+        ('stream_comprehensive_plan', lambda: list(planner.stream_comprehensive_plan(profile)), None),
+        ('calculate_totals', lambda: planner.calculate_totals(profile), None),
+        ('build_summary', lambda: planner.build_summary(profile, totals, health_score), None),
+        ('generate_12_month_projection', lambda: planner.generate_12_month_projection(
+            profile.monthly_income, profile.current_savings, debts, profile.expenses, profile.income_changes,
+            profile.goals, profile.emergency_fund_target
+        ), None),
+        ('project_months', lambda: planner.project_months(
+            profile.monthly_income, profile.current_savings, debts, profile.expenses, profile.income_changes,
+            profile.emergency_fund_target, horizon
+        ), None),
+        ('iter_months', lambda: list(planner.iter_months(
+            profile.monthly_income, profile.current_savings, debts, profile.expenses, profile.income_changes,
+            profile.emergency_fund_target, horizon
+        )), None),
+        ('apply_goal_progress', lambda: planner.apply_goal_progress(base_projection, debts, profile.goals), None),
+        ('iter_goal_progress', lambda: list(planner.iter_goal_progress(base_projection, debts, profile.goals)), None),
+        ('calculate_monthly_debt_payments', lambda: planner.calculate_monthly_debt_payments(
+            debts, profile.monthly_income, expenses_total
+        ), None),
+        ('check_goal_progress', lambda: planner.check_goal_progress(
+            profile.goals, profile.current_savings, 1, initial_debt, totals['total_debt']
+        ), None),
+        ('calculate_debt_strategies[stepper]', lambda: planner.calculate_debt_strategies(
+            profile.monthly_income, debts, available, 'stepper', profile.payoff_horizon_months,
+            profile.current_savings, profile.emergency_fund_target
+        ), None),
+        ('calculate_debt_strategies[events]', lambda: planner.calculate_debt_strategies(
+            profile.monthly_income, debts, available, 'events', profile.payoff_horizon_months,
+            profile.current_savings, profile.emergency_fund_target
+        ), None),
+        ('calculate_optimal_strategy', lambda: planner.calculate_optimal_strategy(
+            debts, available, profile.payoff_horizon_months, profile.current_savings, profile.emergency_fund_target
+        ), None),
+        ('simulate_debt_payoff_batch', lambda: planner.simulate_debt_payoff_batch(orderings, available), None),
+        ('calculate_avalanche_strategy', lambda: planner.calculate_avalanche_strategy(
+            profile.monthly_income, debts, available
+        ), None),
+        ('calculate_snowball_strategy', lambda: planner.calculate_snowball_strategy(
+            profile.monthly_income, debts, available
+        ), None),
+        ('calculate_equal_payment_strategy', lambda: planner.calculate_equal_payment_strategy(
+            profile.monthly_income, debts, available
+        ), None),
+        ('simulate_debt_payoff', lambda: planner.simulate_debt_payoff(
+            debts, profile.monthly_income, available, 'avalanche'
+        ), None),
+        ('generate_recommendations', lambda: planner.generate_recommendations(
+            profile.monthly_income, profile.current_savings, debts, profile.expenses, profile.income_changes,
+            profile.goals, profile.emergency_fund_target, available
+        ), None),
+        ('calculate_financial_health_score', lambda: planner.calculate_financial_health_score(
+            profile.monthly_income, profile.current_savings, totals['total_debt'], expenses_total,
+            profile.emergency_fund_target, available
+        ), None)
+    ]
+
+
+def endpoint_cases(body):
+    """End-to-end /calculate-plan through the Flask test client, with and without the caches"""
+    client = server.app.test_client()
+    cache = server.plan_cache
+
+    def post():
+        response = client.post('/calculate-plan', json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    def cold():
+        server.plan_cache = None
+        reset_memo()
+
+    def cached():
+        server.plan_cache = cache
+
+    return [
+        ('POST /calculate-plan[cold]', post, cold),
+        ('POST /calculate-plan[cached]', post, cached if cache is not None else None)
+    ]
+
+
+def compare(results, baseline, threshold):
+    """Print p50 changes against a saved run and return the cases that regressed"""
+    regressions = []
+    print('\n{:<60} {:>12} {:>12} {:>9}'.format('case', 'baseline ms', 'current ms', 'change'))
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous['p50_ms']:
+            continue
+        change = current['p50_ms'] / previous['p50_ms'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print('{:<60} {:>12.3f} {:>12.3f} {:>+8.1%}{}'.format(name, previous['p50_ms'], current['p50_ms'], change, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--debts', type=int, nargs='+', default=[5, 50])
+    parser.add_argument('--expenses', type=int, default=8)
+    parser.add_argument('--goals', type=int, default=3)
+    parser.add_argument('--income-changes', type=int, default=2)
+    parser.add_argument('--horizon', type=int, nargs='+', default=[12, 120])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='Only run cases whose name contains this text')
+    parser.add_argument('--output', help='Save results to this JSON file')
+    parser.add_argument('--compare', help='Saved results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p50 slowdown before failing (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    results = {}
+    print('{:<60} {:>10} {:>10} {:>10} {:>11}'.format('case', 'ops/s', 'p50 ms', 'p99 ms', 'peak KiB'))
+    for debts in args.debts:
+        for horizon in args.horizon:
+            body = synthetic_profile(debts, args.expenses, args.goals, args.income_changes, horizon, seed=args.seed)
+            label = 'debts={},horizon={}'.format(debts, horizon)
+            for name, func, setup in planner_cases(body) + endpoint_cases(body):
+                name = '{} {}'.format(name, label)
+                if args.only and args.only not in name:
+                    continue
+                result = measure(func, args.runs, setup)
+                results[name] = result
+                print('{:<60} {:>10,.1f} {:>10.3f} {:>10.3f} {:>11,.1f}'.format(
+                    name, result['throughput_per_s'] or 0, result['p50_ms'], result['p99_ms'],
+                    result['peak_memory_kib']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'args': vars(args)
+                },
+                'results': results
+            }, f, indent=2)
+        print('\nSaved {} cases to {}'.format(len(results), args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('\n{} case(s) slower than the baseline by more than {:.0%}'.format(len(regressions), args.threshold))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Measure cold start: time and resident memory to import main and to warm it up, in fresh interpreters
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Runs in each fresh interpreter; prints main.startup_report() after warm_up()
+PROBE = 'import json, main; main.warm_up(); print(json.dumps(main.startup_report()))'
+
+
+def measure(runs):
+    reports = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=SRC, check=True, capture_output=True, text=True)
+        reports.append(json.loads(output.stdout.splitlines()[-1]))
+    return {
+        'runs': runs,
+        'import_ms': round(statistics.median(report['import_seconds'] for report in reports) * 1000, 1),
+        'ready_ms': round(statistics.median(report['ready_seconds'] for report in reports) * 1000, 1),
+        'import_rss_mb': round(statistics.median(report['import_rss_bytes'] for report in reports) / 2 ** 20, 1),
+        'ready_rss_mb': round(statistics.median(report['rss_bytes'] for report in reports) / 2 ** 20, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', help='Save the summary to this JSON file')
+    args = parser.parse_args()
+
+    summary = measure(args.runs)
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Load test POST /calculate-plan against a running server
+
+Usage: python benchmarks/loadtest.py [--url http://127.0.0.1:5000] [--concurrency 16] [--duration 20]
+
+Compare serving modes by running it against each in turn, e.g.
+    cd src && flask --app main run --port 5000
+    cd src && uvicorn asgi:app --port 5000
+Profiles are synthetic and distinct (--profiles) so the plan cache does not hide the work.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bench_planner import percentile  # noqa: E402
+from synthetic import synthetic_profile  # noqa: E402
+
+
+def worker(url, bodies, offset, deadline, backoff, latencies, statuses, lock):
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    index = offset
+    while time.perf_counter() < deadline:
+        body = bodies[index % len(bodies)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/calculate-plan', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+            status = 'error'
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(elapsed)
+        if status == 429:
+            time.sleep(backoff)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--debts', type=int, default=30)
+    parser.add_argument('--horizon', type=int, default=60)
+    parser.add_argument('--profiles', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backoff-ms', type=float, default=50, help='Pause after a 429 before the next request')
+    parser.add_argument('--output', help='Save the summary to this JSON file')
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps(synthetic_profile(args.debts, horizon=args.horizon, seed=args.seed + i))
+        for i in range(args.profiles)
+    ]
+    url = urlparse(args.url)
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(url, bodies, i * len(bodies) // args.concurrency, deadline,
+                                              args.backoff_ms / 1000, latencies, statuses, lock))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    summary = {
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': sum(statuses.values()),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'throughput_per_s': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Synthetic financial profiles for benchmarks
+
+Profiles are plain request bodies (what the frontend POSTs to /calculate-plan),
+so they exercise the same parsing path as real traffic.
+"""
+import random
+
+from main import planner
+from models import GOAL_TYPES, INCOME_CHANGE_TYPES
+
+PRIORITIES = ['critical', 'high', 'medium', 'medium', 'low', 'minimal']
+EXPENSE_CATEGORIES = sorted(planner.expense_categories)
+
+
+def synthetic_debts(count, rng):
+    debts = []
+    for i in range(count):
+        balance = round(rng.uniform(500, 40000), 2)
+        rate = round(rng.uniform(0, 29.99), 2)
+        debts.append({
+            'name': 'Debt {}'.format(i + 1),
+            'current_balance': balance,
+            'interest_rate': rate,
+            # Like a card statement: the month's interest plus 1-3% of the balance
+            'minimum_payment': round(balance * (rate / 100 / 12 + rng.uniform(0.01, 0.03)), 2),
+            'priority': rng.choice(PRIORITIES)
+        })
+    return debts
+
+
+def synthetic_expenses(count, rng):
+    return [
+        {'category': rng.choice(EXPENSE_CATEGORIES), 'amount': round(rng.uniform(20, 1500), 2)}
+        for _ in range(count)
+    ]
+
+
+def synthetic_income_changes(count, rng, horizon):
+    changes = []
+    for _ in range(count):
+        change_type = rng.choice(INCOME_CHANGE_TYPES)
+        amount = rng.uniform(-5, 10) if change_type == 'percentage' else rng.uniform(-500, 2000)
+        changes.append({'type': change_type, 'amount': round(amount, 2), 'start_month': rng.randint(1, horizon)})
+    return changes
+
+
+def synthetic_goals(count, rng, horizon):
+    return [
+        {
+            'name': 'Goal {}'.format(i + 1),
+            'type': rng.choice(GOAL_TYPES),
+            'target_amount': round(rng.uniform(1000, 50000), 2),
+            'target_month': rng.randint(1, horizon)
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_allocation(targets=1000, debts=0, seed=None, rng=None):
+    """Build an /allocate request body: a payroll split across targets accounts and goals plus debts"""
+    rng = rng or random.Random(seed)
+    body = {
+        'amount': round(targets * rng.uniform(150, 400), 2),
+        'keep_in_checking': 1000,
+        'targets': [
+            {
+                'name': 'Target {}'.format(i + 1),
+                'type': rng.choice(['account', 'goal']),
+                'minimum': round(rng.uniform(0, 200), 2),
+                'cap': rng.choice([None, round(rng.uniform(200, 1000), 2)]),
+                'priority': rng.choice(PRIORITIES),
+                'weight': round(rng.uniform(0.5, 3), 2)
+            }
+            for i in range(targets)
+        ]
+    }
+    if debts:
+        body['debts'] = synthetic_debts(debts, rng)
+    return body
+
+
+def synthetic_profile(debts=10, expenses=8, goals=3, income_changes=2, horizon=12, seed=None, rng=None):
+    """Build a /calculate-plan request body with the given number of each entity"""
+    rng = rng or random.Random(seed)
+    monthly_income = round(rng.uniform(3000, 15000), 2)
+    return {
+        'monthly_income': monthly_income,
+        'current_savings': round(rng.uniform(0, 20000), 2),
+        'emergency_fund_target': round(monthly_income * 6, 2),
+        'debts': synthetic_debts(debts, rng),
+        'expenses': synthetic_expenses(expenses, rng),
+        'income_changes': synthetic_income_changes(income_changes, rng, horizon),
+        'goals': synthetic_goals(goals, rng, horizon),
+        'projection_months': horizon
+    }
@@ -0,0 +1,139 @@
+import numpy as np
+
+from factors import monthly_rate
+
+
+def water_fill(budget, floors, caps, weights):
+    """Weighted water-filling: amounts = clip(weights * level, floors, caps) for the level that spends budget
+
+    Assumes budget >= floors.sum() and stops at caps.sum() when the
+    budget is larger. Every target's amount is piecewise linear in the
+    level, with breakpoints at floor / weight and cap / weight, so sorting
+    the 2n breakpoints and accumulating the slope between them finds the
+    level in O(n log n). Zero-weight targets stay at their floor.
+    """
+    floors = np.asarray(floors, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    # Unbounded targets can never take more than the whole budget
+    caps = np.minimum(np.asarray(caps, dtype=float), floors + budget)
+    # A zero-weight target's breakpoints coincide, so it never adds slope
+    caps = np.where(weights > 0, caps, floors)
+    weights = np.where(weights > 0, weights, 1.0)
+    if budget >= caps.sum():
+        return caps
+    if budget <= floors.sum():
+        return floors.copy()
+
+    points = np.concatenate((floors / weights, caps / weights))
+    order = np.argsort(points, kind='stable')
+    points = points[order]
+    slopes = np.cumsum(np.concatenate((weights, -weights))[order])
+    # Total allocated when the level sits at each breakpoint
+    totals = floors.sum() + np.concatenate(([0.0], np.cumsum(slopes[:-1] * np.diff(points))))
+
+    k = int(np.searchsorted(totals, budget))
+    level = points[k - 1] + (budget - totals[k - 1]) / slopes[k - 1]
+    return np.clip(weights * level, floors, caps)
+
+
+def to_cents(amounts, total, caps=None):
+    """Round amounts down to cents, then hand the remaining cents of total to the largest remainders
+
+    Only amounts still a whole cent below their cap get one, so no
+    amount ends up above its cap; cents nobody can take are left over.
+    """
+    scaled = amounts * 100
+    cents = np.floor(scaled + 1e-6)
+    short = int(round(total * 100 - cents.sum()))
+    if short > 0:
+        room = np.ones(len(cents), dtype=bool) if caps is None else cents < np.floor(caps * 100 + 1e-6)
+        candidates = np.flatnonzero(room)
+        cents[candidates[np.argsort((cents - scaled)[candidates], kind='stable')[:short]]] += 1
+    return cents / 100
+
+
+def allocate(request):
+    """Split a paycheck across accounts, goals and debts
+
+    keep_in_checking is set aside first. Minimums are then funded across
+    every target, and surplus goes to priority levels in order (1 =
+    critical), each level water-filled by weight up to its caps before the
+    next gets anything. When the money cannot cover the minimums, levels
+    are funded in order and the first one that falls short is split pro
+    rata to the minimums. A debt's cap is its balance plus this
+    month's interest. Whatever no target can take stays in checking.
+    """
+    targets = request.targets
+    names = [target.name for target in targets] + [debt.name for debt in request.debts]
+    types = [target.type for target in targets] + ['debt'] * len(request.debts)
+    enabled = np.array([target.enabled for target in targets] + [True] * len(request.debts))
+    payoff = np.array([debt.current_balance * (1 + monthly_rate(debt.interest_rate)) for debt in request.debts])
+    caps = np.concatenate((
+        [np.inf if target.cap is None else target.cap for target in targets], payoff
+    )).astype(float)
+    minimums = np.minimum(np.concatenate((
+        [target.minimum for target in targets], [debt.minimum_payment for debt in request.debts]
+    )), caps)
+    priorities = np.array([target.priority for target in targets] + [debt.priority for debt in request.debts])
+    weights = np.array([target.weight for target in targets] + [1.0] * len(request.debts))
+
+    # Disabled targets keep their reported minimum and cap but take nothing
+    limits = np.where(enabled, caps, 0.0)
+    floors = np.where(enabled, minimums, 0.0)
+    available = max(request.amount - request.keep_in_checking, 0.0)
+    total_minimums = float(floors.sum())
+    amounts = np.zeros(len(names))
+    levels = [priorities == level for level in np.unique(priorities)]
+
+    if available >= total_minimums:
+        amounts[:] = floors
+        surplus = available - total_minimums
+        for mask in levels:
+            if surplus <= 0:
+                break
+            level_minimums = floors[mask].sum()
+            amounts[mask] = water_fill(surplus + level_minimums, floors[mask], limits[mask], weights[mask])
+            surplus -= amounts[mask].sum() - level_minimums
+    else:
+        remaining = available
+        for mask in levels:
+            needed = floors[mask].sum()
+            if remaining >= needed:
+                amounts[mask] = floors[mask]
+                remaining -= needed
+                continue
+            amounts[mask] = water_fill(remaining, np.zeros(mask.sum()), floors[mask], floors[mask])
+            break
+
+    amounts = to_cents(amounts, min(amounts.sum(), available), limits)
+    total_allocated = round(float(amounts.sum()), 2)
+    status = np.select(
+        [~enabled, amounts >= caps - 0.005, amounts < minimums - 0.005, amounts > minimums + 0.005],
+        ['disabled', 'capped', 'below_minimum', 'above_minimum'], 'minimum'
+    )
+    return {
+        'allocations': [
+            {
+                'name': name,
+                'type': target_type,
+                'amount': amount,
+                'minimum': round(minimum, 2),
+                'cap': round(cap, 2) if cap != np.inf else None,
+                'priority': priority,
+                'status': target_status
+            }
+            for name, target_type, amount, minimum, cap, priority, target_status in zip(
+                names, types, amounts.tolist(), minimums.tolist(), caps.tolist(), priorities.tolist(), status.tolist()
+            )
+        ],
+        'summary': {
+            'amount': request.amount,
+            'keep_in_checking': request.keep_in_checking,
+            'available': round(available, 2),
+            'total_minimums': round(total_minimums, 2),
+            'total_allocated': total_allocated,
+            'minimum_shortfall': round(max(total_minimums - available, 0.0), 2),
+            # The buffer plus anything every target was capped out of
+            'left_in_checking': round(request.amount - total_allocated, 2)
+        }
+    }
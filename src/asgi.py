@@ -0,0 +1,326 @@
+"""Production entry point: uvicorn asgi:app
+
+Plans, batches, Monte Carlo runs and sweeps are computed on a bounded
+process pool so large payloads no longer hold up every other request, and
+the health checks are answered on the event loop itself. Everything else
+is served by the Flask app through asgiref's WSGI adapter on a thread pool.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import main
+from metrics import server_timing
+
+PLAN_WORKERS = int(os.environ.get('PLAN_WORKERS', os.cpu_count() or 1))
+# Plans running or waiting for a worker; beyond this new plans get 429
+PLAN_QUEUE_SIZE = int(os.environ.get('PLAN_QUEUE_SIZE', PLAN_WORKERS * 4))
+PLAN_TIMEOUT_SECONDS = float(os.environ.get('PLAN_TIMEOUT_SECONDS', 10))
+# Keep below terminationGracePeriodSeconds in deployment.yaml
+SHUTDOWN_TIMEOUT_SECONDS = float(os.environ.get('SHUTDOWN_TIMEOUT_SECONDS', 20))
+# Threads running the remaining Flask routes
+FLASK_THREADS = int(os.environ.get('FLASK_THREADS', 16))
+MAX_BODY_BYTES = main.MAX_BODY_BYTES
+# What flask_cors adds to the Flask routes, for the responses sent from here
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+# Pooled routes and the worker function behind each
+POOLED_ROUTES = {
+    '/calculate-plan': main.plan_request,
+    '/calculate-plan-batch': main.plan_batch_request,
+    '/monte-carlo': main.monte_carlo_request,
+    '/sweep': main.sweep_request
+}
+
+
+class Overloaded(Exception):
+    """Raised when the plan queue is full"""
+
+
+class PlanDispatcher:
+    """Bounded process pool for plan requests"""
+
+    def __init__(self, workers=PLAN_WORKERS, queue_size=PLAN_QUEUE_SIZE, timeout=PLAN_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.pending = 0
+        self.accepting = False
+        self._executor = None
+        self._idle = None
+        self._warm_up = None
+
+    def start(self):
+        # Workers import main fresh instead of forking the event loop's threads
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.accepting = True
+        self._warm_up = asyncio.ensure_future(self.warm_up())
+
+    async def warm_up(self):
+        """Spawn and warm every worker, then the serving process, which makes /readyz report ready"""
+        loop = asyncio.get_running_loop()
+        # Submitted together, so each one starts its own worker
+        await asyncio.gather(*[loop.run_in_executor(self._executor, main.warm_up) for _ in range(self.workers)])
+        await asyncio.to_thread(main.warm_up)
+
+    async def run(self, func, *args):
+        """Run func on the pool, raising Overloaded when the queue is full and TimeoutError after timeout
+
+        A timed-out plan keeps its worker until it finishes, and keeps
+        counting against the queue until then, so backpressure reflects
+        what the pool is actually doing.
+        """
+        if self.pending >= self.queue_size:
+            raise Overloaded()
+        self.pending += 1
+        self._idle.clear()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    def _release(self, _):
+        self.pending -= 1
+        if not self.pending:
+            self._idle.set()
+
+    async def shutdown(self, timeout=SHUTDOWN_TIMEOUT_SECONDS):
+        """Stop taking plans, let queued ones finish for up to timeout, then stop the workers"""
+        self.accepting = False
+        self._warm_up.cancel()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """asgiref's per-request WSGI adapter, but running the app on executor
+
+    The stock adapter runs every request on one shared thread
+    (thread_sensitive), so one slow route stalls all the others.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        run = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        await sync_to_async(run, thread_sensitive=False, executor=self.executor)(self, body)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    def __init__(self, wsgi_application, threads=FLASK_THREADS):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='flask')
+
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+dispatcher = PlanDispatcher()
+flask_app = ThreadedWsgiToAsgi(main.app)
+
+
+async def read_body(receive, limit=MAX_BODY_BYTES):
+    """Read the whole request body, returning None once it grows past limit"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def encode_headers(headers):
+    headers = {'Content-Type': 'application/json', **CORS_HEADERS, **headers}
+    return [(name.lower().encode(), str(value).encode()) for name, value in headers.items()]
+
+
+async def respond(send, status, body, headers=None):
+    if isinstance(body, dict):
+        body = json.dumps(body)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    raw_headers = [(b'content-length', str(len(body)).encode())] + encode_headers(headers or {})
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def pooled(scope):
+    """Whether a request is one the process pool computes (streamed plans stay on Flask)"""
+    if scope['type'] != 'http' or scope['path'] not in POOLED_ROUTES or scope['method'] != 'POST':
+        return False
+    if scope['path'] != '/calculate-plan':
+        return True
+    accept = dict(scope['headers']).get(b'accept', b'')
+    return b'stream=' not in scope['query_string'] and b'application/x-ndjson' not in accept
+
+
+class DirectRequest:
+    """Counts one directly served request in http_requests_total and builds its Server-Timing header"""
+
+    def __init__(self, scope):
+        self.endpoint = scope['path']
+        self.method = scope['method']
+        self.started = time.perf_counter()
+        self.server_timing = main.apply_runtime_config().get('server_timing', main.SERVER_TIMING)
+
+    def finish(self, status, headers=None, timings=()):
+        """Count the request and return headers with Server-Timing added when it is switched on"""
+        main.metrics.increment('http_requests_total', endpoint=self.endpoint, method=self.method, status=status)
+        headers = dict(headers or {})
+        if self.server_timing:
+            headers['Server-Timing'] = server_timing(list(timings) + [('total', time.perf_counter() - self.started)])
+        return headers
+
+
+async def run_pooled(func, *args):
+    """Run main.worker_request(func, *args) on the dispatcher, merging the worker's report
+
+    Returns (status, headers, body, timings) and raises like dispatcher.run.
+    """
+    status, headers, payload, timings, report = await dispatcher.run(main.worker_request, func, *args)
+    main.merge_worker_report(report)
+    return status, headers, payload, timings
+
+
+async def compute(scope, receive, send):
+    """Serve a pooled route: parse nothing here, hand the raw body to a worker"""
+    request = DirectRequest(scope)
+    if not dispatcher.accepting:
+        await respond(send, 503, {'error': 'Shutting down'}, request.finish(503, {'Connection': 'close'}))
+        return
+    body = await read_body(receive)
+    if body is None:
+        await respond(
+            send, 413, {'error': 'Request body too large', 'limit_bytes': MAX_BODY_BYTES}, request.finish(413)
+        )
+        return
+    if scope['path'] == '/calculate-plan-batch':
+        await calculate_plan_batch(scope, body, request, send)
+        return
+    if scope['path'] == '/calculate-plan':
+        args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        accept = dict(scope['headers']).get(b'accept', b'').decode('latin-1')
+        call = (main.plan_request, body, args, accept)
+    else:
+        call = (POOLED_ROUTES[scope['path']], body)
+    try:
+        status, headers, payload, timings = await run_pooled(*call)
+    except Overloaded:
+        await respond(
+            send, 429, {'error': 'Too many plans in progress, retry shortly'}, request.finish(429, {'Retry-After': 1})
+        )
+        return
+    except asyncio.TimeoutError:
+        await respond(send, 504, {'error': timeout_message()}, request.finish(504))
+        return
+    await respond(send, status, payload, request.finish(status, headers, timings))
+
+
+def timeout_message():
+    return 'Plan timed out after {:g}s'.format(dispatcher.timeout)
+
+
+async def calculate_plan_batch(scope, body, request, send):
+    """Stream a batch as NDJSON, planning BATCH_CHUNKSIZE profiles per pool task
+
+    At most PLAN_WORKERS chunks are in flight, so a large batch cannot take
+    the whole queue. A chunk that is rejected or times out reports the
+    error on each of its items, like any other failed item.
+    """
+    content_type = dict(scope['headers']).get(b'content-type', b'').decode('latin-1')
+    profiles, error = main.parse_batch(body, content_type.split(';')[0].strip())
+    if error is not None:
+        await respond(send, 400, {'error': error}, request.finish(400))
+        return
+    if dispatcher.pending >= dispatcher.queue_size:
+        await respond(
+            send, 429, {'error': 'Too many plans in progress, retry shortly'}, request.finish(429, {'Retry-After': 1})
+        )
+        return
+
+    size = main.BATCH_CHUNKSIZE
+    chunks = deque((start, profiles[start:start + size]) for start in range(0, len(profiles), size))
+    running = deque()
+
+    def submit():
+        start, chunk = chunks.popleft()
+        running.append((start, chunk, asyncio.ensure_future(run_pooled(main.plan_batch_request, chunk, start))))
+
+    while chunks and len(running) < min(dispatcher.workers, dispatcher.queue_size - dispatcher.pending):
+        submit()
+    headers = encode_headers(request.finish(200, {'Content-Type': 'application/x-ndjson'}))
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    while running:
+        start, chunk, task = running.popleft()
+        try:
+            _, _, lines, _ = await task
+        except Overloaded:
+            lines = failed_lines(start, chunk, 'Too many plans in progress, retry shortly')
+        except asyncio.TimeoutError:
+            lines = failed_lines(start, chunk, timeout_message())
+        # Only once this chunk is answered, so the batch does not compete with itself for queue slots
+        if chunks:
+            submit()
+        await send({'type': 'http.response.body', 'body': lines.encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def failed_lines(start, chunk, error):
+    return ''.join(json.dumps({'index': start + i, 'error': error}) + '\n' for i in range(len(chunk)))
+
+
+async def probe(scope, send):
+    """Answer /healthz and /readyz on the event loop, so busy Flask threads never fail the probes"""
+    request = DirectRequest(scope)
+    if scope['path'] == '/healthz':
+        await respond(send, 200, {'status': 'ok'}, request.finish(200))
+        return
+    report = main.startup_report()
+    status = 200 if report['ready'] else 503
+    await respond(send, status, report, request.finish(status))
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            dispatcher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await dispatcher.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] in ('/healthz', '/readyz'):
+        await probe(scope, send)
+        return
+    # Streaming plans and every other route stay on the Flask app
+    if pooled(scope):
+        await compute(scope, receive, send)
+        return
+    await flask_app(scope, receive, send)
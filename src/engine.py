@@ -0,0 +1,207 @@
+import numpy as np
+
+from factors import CLEARED_BALANCE, amortization_tables
+
+# Payoff periods this close to a whole month are that month; log() rounding would otherwise push them over
+PERIOD_TOLERANCE = 1e-6
+
+
+def _prepare(balances, rates, minimums, extra, ordered):
+    balances = np.array(balances, dtype=float, ndmin=2)
+    monthly_rates = np.asarray(rates, dtype=float).reshape(balances.shape) / 100 / 12
+    minimums = np.asarray(minimums, dtype=float).reshape(balances.shape)
+    extra = np.maximum(np.asarray(extra, dtype=float), 0)
+    if extra.ndim < 2:
+        extra = extra.reshape(-1)
+    ordered = np.broadcast_to(np.asarray(ordered, dtype=bool), balances.shape[:1])
+    return balances, monthly_rates, minimums, extra, ordered
+
+
+def fill_in_order(amount, needs):
+    """Allocate amount (per row) across needs (rows x debts) front to back"""
+    before = np.cumsum(needs, axis=1) - needs
+    return np.clip(amount[:, None] - before, 0.0, needs)
+
+
+def month_column(schedule, month):
+    """Per-row values for a 1-based month from a (rows,) or (rows x months) schedule; the last month repeats"""
+    if schedule.ndim == 1:
+        return schedule
+    return schedule[:, min(month, schedule.shape[1]) - 1]
+
+
+def _step_month(balances, monthly_rates, minimums, extra, active, ordered):
+    """Advance every row by exactly one month, returning balances and interest"""
+    interest = np.where(active, balances * monthly_rates, 0.0)
+    owed = balances + interest - minimums
+
+    if ordered.any():
+        # Ordered rows put extra, plus whatever minimums a debt no longer needs, on their debts front to back
+        rolled = extra + np.where(active, np.maximum(-owed, 0.0), minimums).sum(axis=1)
+        prepaid = fill_in_order(np.where(ordered, rolled, 0.0), np.where(active, np.maximum(owed, 0.0), 0.0))
+        owed = np.where(ordered[:, None], owed - prepaid, owed)
+        extra = np.where(ordered, 0.0, extra)
+
+    # The equal split is recounted debt by debt, so a debt cleared earlier
+    # in the month hands its share to the ones after it. Clearing a debt
+    # only ever raises later shares, so the set of cleared debts grows
+    # monotonically and this settles in a handful of passes.
+    active_counts = active.sum(axis=1)[:, None]
+    cleared = np.zeros_like(active)
+    while True:
+        counts = active_counts - (np.cumsum(cleared, axis=1) - cleared)
+        share = np.divide(extra[:, None], counts, out=np.zeros_like(balances), where=active)
+        new_balances = owed - share
+        now_cleared = active & (new_balances <= CLEARED_BALANCE)
+        if np.array_equal(now_cleared, cleared):
+            break
+        cleared = now_cleared
+
+    balances = np.where(active, np.where(cleared, 0.0, new_balances), balances)
+    return balances, interest.sum(axis=1)
+
+
+def non_amortizing(balances, monthly_rates, minimums, extra, ordered):
+    """Rows that can never be paid off: no extra funds at all and a debt whose minimum does not cover its interest
+
+    Without extra funds every debt is paid on its own, and a balance its
+    payment does not shrink only grows, so such rows always run to the horizon.
+    Ordered rows are the exception while some minimum can be rolled over:
+    one that is already free, or that of a debt which will be paid off.
+    """
+    no_extra = extra <= 0 if extra.ndim == 1 else (extra <= 0).all(axis=1)
+    active = balances > 0
+    stuck = active & (minimums <= balances * monthly_rates)
+    rollover = ((~active & (minimums > 0)) | (active & ~stuck)).any(axis=1)
+    return no_extra & stuck.any(axis=1) & ~(ordered & rollover)
+
+
+def simulate_payoff_batch(balances, rates, minimums, extra, max_months=120, ordered=False):
+    """Simulate debt payoff for a (scenarios x debts) batch in one pass
+
+    Every row is an independent scenario (e.g. one strategy). ``extra`` holds
+    the per-row monthly amount split equally across the row's active debts in
+    row order; rows that only pay minimums use 0. It may also be a
+    (scenarios x months) schedule whose last month repeats. Rows where
+    ``ordered`` (a flag for all rows or one per row) is set instead spend
+    extra on their debts front to back, as avalanche and snowball do, and
+    add to it the minimums paid-off debts no longer need, so they always
+    spend minimums plus extra while any debt is open. Rows stop accruing months
+    and interest as soon as all of their balances reach zero, and the loop
+    exits early once every row is paid off. Rows that can never be paid off
+    go to solve_payoff_events instead of stepping through every month.
+    """
+    aprs = np.array(rates, dtype=float, ndmin=2)
+    balances, monthly_rates, minimums, extra, ordered = _prepare(balances, rates, minimums, extra, ordered)
+
+    stuck = non_amortizing(balances, monthly_rates, minimums, extra, ordered)
+    if not stuck.any():
+        return _step_batch(balances, monthly_rates, minimums, extra, ordered, max_months)
+
+    months = np.zeros(balances.shape[0], dtype=int)
+    total_interest = np.zeros(balances.shape[0])
+    months[stuck], total_interest[stuck] = solve_payoff_events(
+        balances[stuck], aprs.reshape(balances.shape)[stuck], minimums[stuck], np.zeros(stuck.sum()), max_months
+    )
+    if not stuck.all():
+        months[~stuck], total_interest[~stuck] = _step_batch(
+            balances[~stuck], monthly_rates[~stuck], minimums[~stuck], extra[~stuck], ordered[~stuck], max_months
+        )
+    return months, total_interest
+
+
+def _step_batch(balances, monthly_rates, minimums, extra, ordered, max_months):
+    rows = balances.shape[0]
+    months = np.zeros(rows, dtype=int)
+    total_interest = np.zeros(rows)
+
+    active = balances > 0
+    running = active.any(axis=1)
+    month = 0
+    while month < max_months and running.any():
+        month += 1
+        months += running
+
+        balances, interest = _step_month(balances, monthly_rates, minimums, month_column(extra, month), active, ordered)
+        total_interest += interest
+
+        active = balances > 0
+        running = active.any(axis=1)
+
+    return months, total_interest
+
+
+def solve_payoff_events(balances, rates, minimums, extra, max_months=120, ordered=False):
+    """Event-driven counterpart of simulate_payoff_batch
+
+    Payments only change when a debt is paid off. In between, every active
+    balance follows the annuity recurrence b' = b * (1 + i) - p, so the
+    solver jumps each row to the month before its next payoff with the
+    closed form and steps that single month exactly. Cost grows with the
+    number of payoffs instead of the number of months, so it wins on long
+    horizons with few debts; with many debts paying off months apart it
+    does about as many passes as the stepper, each more expensive.
+    The closed-form factors come from the shared amortization tables.
+    """
+    aprs = np.array(rates, dtype=float, ndmin=2)
+    balances, monthly_rates, minimums, extra, ordered = _prepare(balances, rates, minimums, extra, ordered)
+    if extra.ndim > 1:
+        raise ValueError('solve_payoff_events needs a constant extra per row, not a monthly schedule')
+
+    # One table per distinct APR; rows of a strategy batch share their debts' rates
+    unique_aprs, table_index = np.unique(aprs.reshape(balances.shape), return_inverse=True)
+    growth_table, accumulated_table = amortization_tables(unique_aprs, max_months)
+    table_index = table_index.reshape(balances.shape)
+
+    rows = balances.shape[0]
+    months = np.zeros(rows, dtype=int)
+    total_interest = np.zeros(rows)
+    active = balances > 0
+    running = active.any(axis=1)
+    while running.any():
+        active_counts = active.sum(axis=1)
+        # Until the next payoff ordered rows put everything above the minimums on their first active debt
+        target = active & (np.cumsum(active, axis=1) == 1)
+        rolled = extra + np.where(active, 0.0, minimums).sum(axis=1)
+        payment = minimums + np.where(
+            ordered[:, None], np.where(target, rolled[:, None], 0.0), (extra / np.maximum(active_counts, 1))[:, None]
+        )
+
+        # Months until each active debt clears under the current payments
+        with np.errstate(divide='ignore', invalid='ignore'):
+            first_interest = balances * monthly_rates
+            periods = np.where(
+                monthly_rates > 0,
+                np.log(payment / (payment - first_interest)) / np.log1p(monthly_rates),
+                balances / payment
+            )
+        nearest = np.round(periods)
+        periods = np.where(np.abs(periods - nearest) <= PERIOD_TOLERANCE, nearest, np.ceil(periods))
+        periods = np.where(active & (payment > first_interest), periods, np.inf)
+
+        next_payoff = periods.min(axis=1)
+        remaining = max_months - months
+        jump = np.where(running, np.where(next_payoff > remaining, remaining, np.maximum(next_payoff, 1) - 1), 0)
+        jump = jump.astype(int)
+
+        jumping = active & (jump > 0)[:, None]
+        if jumping.any():
+            growth = growth_table[table_index, jump[:, None]]
+            accumulated = accumulated_table[table_index, jump[:, None]]
+            jumped = growth * balances - payment * accumulated
+            # Interest paid over the jump is whatever the payments did not retire
+            total_interest += np.where(jumping, jumped - balances + jump[:, None] * payment, 0.0).sum(axis=1)
+            balances = np.where(jumping, jumped, balances)
+            months += jump
+
+        stepping = running & (months < max_months)
+        balances, interest = _step_month(
+            balances, monthly_rates, minimums, extra, active & stepping[:, None], ordered
+        )
+        total_interest += interest
+        months += stepping
+
+        active = balances > 0
+        running = active.any(axis=1) & (months < max_months)
+
+    return months, total_interest
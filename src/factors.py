@@ -0,0 +1,61 @@
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# Monthly rates are a few dozen bytes each; amortization tables are 16 bytes per month,
+# so the default 512 tables of up to 600 months stay under 5 MB per process
+FACTOR_CACHE_SIZE = int(os.environ.get('FACTOR_CACHE_SIZE', 4096))
+AMORTIZATION_CACHE_SIZE = int(os.environ.get('AMORTIZATION_CACHE_SIZE', 512))
+
+# Balances at or below this are paid off; every payoff engine uses it so float residue
+# from an exact annuity payment never costs an extra month
+CLEARED_BALANCE = 1e-6
+
+AmortizationTable = namedtuple('AmortizationTable', ['growth', 'accumulated'])
+
+
+@lru_cache(maxsize=FACTOR_CACHE_SIZE)
+def monthly_rate(apr):
+    """Monthly interest rate for an APR in percent"""
+    return apr / 100 / 12
+
+
+@lru_cache(maxsize=AMORTIZATION_CACHE_SIZE)
+def amortization_table(apr, months):
+    """Read-only compounding and annuity factors for k = 0..months of a level-payment loan
+
+    After k months a balance b paying p a month stands at
+    b * growth[k] - p * accumulated[k].
+    """
+    import numpy as np
+
+    rate = monthly_rate(apr)
+    growth = np.power(1 + rate, np.arange(months + 1, dtype=float))
+    accumulated = (growth - 1) / rate if rate > 0 else np.arange(months + 1, dtype=float)
+    growth.flags.writeable = False
+    accumulated.flags.writeable = False
+    return AmortizationTable(growth, accumulated)
+
+
+def amortization_tables(aprs, months):
+    """Stack the tables for several APRs into (len(aprs) x months + 1) growth and accumulated arrays"""
+    import numpy as np
+
+    tables = [amortization_table(float(apr), months) for apr in aprs]
+    return np.stack([table.growth for table in tables]), np.stack([table.accumulated for table in tables])
+
+
+def cache_stats():
+    """Hit ratio and size of every factor cache"""
+    stats = {}
+    for func in (monthly_rate, amortization_table):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        stats[func.__name__] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_ratio': info.hits / lookups if lookups else 0,
+            'size': info.currsize,
+            'max_entries': info.maxsize
+        }
+    return stats
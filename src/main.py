@@ -1,15 +1,53 @@
-from flask import Flask, render_template, request, url_for, jsonify
-import pandas as pd
+import time
+
+# Taken before the other imports so the startup report covers them
+STARTED_AT = time.perf_counter()
+
+from flask import Flask, Response, g, render_template, request, url_for, jsonify
 from flask_cors import CORS
+import importlib
 import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import math
 
+# engine, optimizer, montecarlo, sweep and allocator (and NumPy with them) are imported on first use
+from factors import CLEARED_BALANCE, cache_stats as factor_cache_stats, monthly_rate
+from metrics import RuntimeConfig, SamplingProfiler, metrics, resident_memory_bytes, server_timing
+from models import AllocationRequest, FinancialProfile, MonteCarloSettings, SweepSettings, ValidationError, month_income as month_income_for
+from plan_cache import SectionMemo, create_plan_cache
+from plan_store import create_plan_store
+from wire import encode, parse_format, shape_plan, wants_msgpack
+
+# Engine functions by name, looked up once engine is loaded
+PAYOFF_SOLVERS = {
+    'stepper': 'simulate_payoff_batch',
+    'events': 'solve_payoff_events'
+}
+NUMERIC_MODULES = ('engine', 'optimizer', 'montecarlo', 'sweep', 'allocator')
+# Up to this many debts the plain Python stepper beats the NumPy engines' per-month array overhead
+SCALAR_PAYOFF_MAX_DEBTS = int(os.environ.get('SCALAR_PAYOFF_MAX_DEBTS', 24))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))
+BATCH_CHUNKSIZE = int(os.environ.get('BATCH_CHUNKSIZE', 4))
+MAX_BATCH_PROFILES = int(os.environ.get('MAX_BATCH_PROFILES', 1000))
+# Largest request body accepted by any route (asgi.py applies it to its pooled routes too); bigger ones get 413
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 4 * 1024 * 1024))
+SECTION_MEMO_SIZE = int(os.environ.get('SECTION_MEMO_SIZE', 256))
+# Projection cells (FinancialProfile.projection_cells) each memoized section may hold
+SECTION_MEMO_MAX_CELLS = int(os.environ.get('SECTION_MEMO_MAX_CELLS', 200000))
+# Default for the Server-Timing header; the mounted config's "server_timing" key overrides it at runtime
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
 app = Flask(__name__, static_folder="static", template_folder="templates")
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
 CORS(app)
 
 class ComprehensiveFinancialPlanner:
     def __init__(self):
+        self.section_memo = SectionMemo(SECTION_MEMO_SIZE, SECTION_MEMO_MAX_CELLS)
         self.expense_categories = {
             'housing': {
                 'name': 'Housing',
@@ -85,94 +123,200 @@ class ComprehensiveFinancialPlanner:
     
     def calculate_comprehensive_plan(self, financial_data):
         """Calculate comprehensive financial plan with variable income and goals"""
-        monthly_income = float(financial_data.get('monthly_income', 0))
-        current_savings = float(financial_data.get('current_savings', 0))
-        debts = financial_data.get('debts', [])
-        expenses = financial_data.get('expenses', [])
-        income_changes = financial_data.get('income_changes', [])
-        goals = financial_data.get('goals', [])
-        emergency_fund_target = float(financial_data.get('emergency_fund_target', monthly_income * 6))
-        
-        # Calculate total debt and minimum payments
-        total_debt = sum(float(debt['current_balance']) for debt in debts)
-        total_min_payments = sum(float(debt['minimum_payment']) for debt in debts)
+        profile = financial_data if isinstance(financial_data, FinancialProfile) else FinancialProfile.parse(financial_data)
+        monthly_income = profile.monthly_income
+        current_savings = profile.current_savings
+        debts = profile.debts
+        expenses = profile.expenses
+        income_changes = profile.income_changes
+        goals = profile.goals
+        emergency_fund_target = profile.emergency_fund_target
+        payoff_solver = profile.payoff_solver
+        payoff_horizon = profile.payoff_horizon_months
+        emergency_fund_share = profile.emergency_fund_share
+        projection_months = profile.projection_months
+        detail_months = profile.projection_detail_months
+        totals = self.calculate_totals(profile)
+        available_funds = totals['available_funds']
         
-        # Calculate current monthly expenses
-        current_expenses = {}
-        for expense in expenses:
-            category = expense.get('category', 'other')
-            if category not in current_expenses:
-                current_expenses[category] = 0
-            current_expenses[category] += float(expense.get('amount', 0))
+        # Each section is memoized on exactly the inputs it reads, so editing
+        # e.g. a goal only recomputes the goal progress overlay
+        memo_trace = {'memo': [], 'computed': []}
         
-        # Calculate total current monthly expenses
-        total_current_expenses = sum(current_expenses.values())
-        
-        # Calculate available funds after minimum payments and current expenses
-        available_funds = monthly_income - total_min_payments - total_current_expenses
-        
-        # Generate 12-month projection
-        projection = self.generate_12_month_projection(
-            monthly_income, current_savings, debts, expenses, 
-            income_changes, goals, emergency_fund_target
+        # Generate the projection, then overlay goal progress on its monthly state
+        projection_key, base_projection = self.compute_section(
+            'projection',
+            (monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target,
+             projection_months, detail_months),
+            lambda: self.project_months(
+                monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target,
+                projection_months, detail_months
+            ),
+            memo_trace,
+            profile.projection_cells()
+        )
+        _, projection = self.compute_section(
+            'goal_progress',
+            (projection_key, goals),
+            lambda: self.apply_goal_progress(base_projection, debts, goals),
+            memo_trace,
+            profile.projection_cells()
         )
         
         # Calculate debt payoff strategies
-        debt_strategies = self.calculate_debt_strategies(monthly_income, debts, available_funds)
+        _, debt_strategies = self.compute_section(
+            'debt_strategies',
+            (debts, available_funds, payoff_solver, payoff_horizon, current_savings, emergency_fund_target,
+             emergency_fund_share),
+            lambda: self.calculate_debt_strategies(
+                monthly_income, debts, available_funds, payoff_solver, payoff_horizon,
+                current_savings, emergency_fund_target, emergency_fund_share
+            ),
+            memo_trace
+        )
         
         # Generate recommendations
-        recommendations = self.generate_recommendations(
-            monthly_income, current_savings, debts, expenses, 
-            income_changes, goals, emergency_fund_target, available_funds
+        _, recommendations = self.compute_section(
+            'recommendations',
+            (monthly_income, current_savings, debts, expenses, income_changes, goals,
+             emergency_fund_target, available_funds),
+            lambda: self.generate_recommendations(
+                monthly_income, current_savings, debts, expenses, 
+                income_changes, goals, emergency_fund_target, available_funds
+            ),
+            memo_trace
         )
         
         # Calculate financial health score
-        health_score = self.calculate_financial_health_score(
-            monthly_income, current_savings, total_debt, total_current_expenses,
-            emergency_fund_target, available_funds
+        _, health_score = self.compute_section(
+            'health_score',
+            (monthly_income, current_savings, totals['total_debt'], totals['total_current_expenses'],
+             emergency_fund_target, available_funds),
+            lambda: self.calculate_financial_health_score(
+                monthly_income, current_savings, totals['total_debt'], totals['total_current_expenses'],
+                emergency_fund_target, available_funds
+            ),
+            memo_trace
         )
         
         return {
-            'summary': {
-                'monthly_income': monthly_income,
-                'current_savings': current_savings,
-                'total_debt': total_debt,
-                'total_min_payments': total_min_payments,
-                'total_current_expenses': total_current_expenses,
-                'available_funds': available_funds,
-                'emergency_fund_target': emergency_fund_target,
-                'financial_health_score': health_score
-            },
+            'summary': self.build_summary(profile, totals, health_score),
             'projection': projection,
             'debt_strategies': debt_strategies,
             'recommendations': recommendations,
-            'expense_breakdown': current_expenses
+            'expense_breakdown': totals['current_expenses'],
+            'memo': memo_trace
+        }
+    
+    def compute_section(self, name, inputs, compute, trace, cost=1):
+        """Compute a plan section through the memo, timing it as a metrics stage"""
+        with metrics.stage(name):
+            key, value = self.section_memo.compute(name, inputs, compute, trace, cost)
+        metrics.increment('planner_memo_total', section=name, result='hit' if name in trace['memo'] else 'computed')
+        return key, value
+    
+    def stream_comprehensive_plan(self, profile):
+        """Yield (section, payload) pairs, emitting projection months as they are computed
+
+        The summary comes first and each month follows as soon as it is
+        simulated, so clients can render the timeline before the strategy
+        simulations finish. Streaming bypasses the memo.
+        """
+        totals = self.calculate_totals(profile)
+        health_score = self.calculate_financial_health_score(
+            profile.monthly_income, profile.current_savings, totals['total_debt'], totals['total_current_expenses'],
+            profile.emergency_fund_target, totals['available_funds']
+        )
+        yield 'summary', self.build_summary(profile, totals, health_score)
+        
+        months = self.iter_months(
+            profile.monthly_income, profile.current_savings, profile.debts, profile.expenses,
+            profile.income_changes, profile.emergency_fund_target, profile.projection_months,
+            profile.projection_detail_months
+        )
+        for row in self.iter_goal_progress(months, profile.debts, profile.goals):
+            yield 'month', row
+        
+        with metrics.stage('debt_strategies'):
+            debt_strategies = self.calculate_debt_strategies(
+                profile.monthly_income, profile.debts, totals['available_funds'], profile.payoff_solver,
+                profile.payoff_horizon_months, profile.current_savings, profile.emergency_fund_target,
+                profile.emergency_fund_share
+            )
+        yield 'debt_strategies', debt_strategies
+        with metrics.stage('recommendations'):
+            recommendations = self.generate_recommendations(
+                profile.monthly_income, profile.current_savings, profile.debts, profile.expenses,
+                profile.income_changes, profile.goals, profile.emergency_fund_target, totals['available_funds']
+            )
+        yield 'recommendations', recommendations
+        yield 'expense_breakdown', totals['current_expenses']
+    
+    def calculate_totals(self, profile):
+        """Calculate debt and expense totals and the funds left after minimum payments"""
+        # Calculate total debt and minimum payments
+        total_debt = sum(debt.current_balance for debt in profile.debts)
+        total_min_payments = sum(debt.minimum_payment for debt in profile.debts)
+        
+        # Calculate current monthly expenses
+        current_expenses = {}
+        for expense in profile.expenses:
+            current_expenses[expense.category] = current_expenses.get(expense.category, 0) + expense.amount
+        
+        # Calculate total current monthly expenses
+        total_current_expenses = sum(current_expenses.values())
+        
+        return {
+            'total_debt': total_debt,
+            'total_min_payments': total_min_payments,
+            'current_expenses': current_expenses,
+            'total_current_expenses': total_current_expenses,
+            # Calculate available funds after minimum payments and current expenses
+            'available_funds': profile.monthly_income - total_min_payments - total_current_expenses
+        }
+    
+    def build_summary(self, profile, totals, health_score):
+        """Build the summary section of a plan"""
+        return {
+            'monthly_income': profile.monthly_income,
+            'current_savings': profile.current_savings,
+            'total_debt': totals['total_debt'],
+            'total_min_payments': totals['total_min_payments'],
+            'total_current_expenses': totals['total_current_expenses'],
+            'available_funds': totals['available_funds'],
+            'emergency_fund_target': profile.emergency_fund_target,
+            'financial_health_score': health_score
         }
     
     def generate_12_month_projection(self, monthly_income, current_savings, debts, expenses, income_changes, goals, emergency_fund_target):
         """Generate 12-month financial projection"""
-        projection = []
-        current_debts = [debt.copy() for debt in debts]
+        projection = self.project_months(
+            monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target
+        )
+        return self.apply_goal_progress(projection, debts, goals)
+    
+    def project_months(self, monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target,
+                       months=12, detail_months=None):
+        """Project monthly cash flow without goal progress"""
+        return list(self.iter_months(
+            monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target,
+            months, detail_months
+        ))
+    
+    def iter_months(self, monthly_income, current_savings, debts, expenses, income_changes, emergency_fund_target,
+                    months=12, detail_months=None):
+        """Yield projected months one at a time; rows after detail_months omit debt_payments"""
+        balances = [debt.current_balance for debt in debts]
         current_balance = current_savings
+        month_expenses = sum(expense.amount for expense in expenses)
+        metrics.increment('planner_debts_processed_total', len(debts), stage='projection')
         
-        for month in range(1, 13):
+        for month in range(1, months + 1):
             # Apply income changes
-            month_income = monthly_income
-            for change in income_changes:
-                if change['start_month'] <= month:
-                    if change['type'] == 'percentage':
-                        month_income *= (1 + change['amount'] / 100)
-                    elif change['type'] == 'fixed':
-                        month_income += change['amount']
-                    elif change['type'] == 'one_time':
-                        if change['start_month'] == month:
-                            month_income += change['amount']
-            
-            # Calculate expenses for this month
-            month_expenses = sum(float(exp['amount']) for exp in expenses)
+            month_income = month_income_for(monthly_income, income_changes, month)
             
             # Calculate debt payments (avalanche method)
-            debt_payments = self.calculate_monthly_debt_payments(current_debts, month_income, month_expenses)
+            debt_payments = self.calculate_monthly_debt_payments(debts, month_income, month_expenses, balances)
             
             # Calculate savings
             month_savings = month_income - month_expenses - sum(payment['amount'] for payment in debt_payments)
@@ -180,13 +324,9 @@ class ComprehensiveFinancialPlanner:
             
             # Update debt balances
             for i, payment in enumerate(debt_payments):
-                if i < len(current_debts):
-                    current_debts[i]['current_balance'] = max(0, float(current_debts[i]['current_balance']) - payment['principal'])
-            
-            # Check goal progress
-            goal_progress = self.check_goal_progress(goals, current_balance, month, current_debts)
+                balances[i] = max(0, balances[i] - payment['principal'])
             
-            projection.append({
+            row = {
                 'month': month,
                 'income': month_income,
                 'expenses': month_expenses,
@@ -194,150 +334,269 @@ class ComprehensiveFinancialPlanner:
                 'savings': month_savings,
                 'current_balance': current_balance,
                 'emergency_fund_ratio': current_balance / emergency_fund_target if emergency_fund_target > 0 else 0,
-                'goal_progress': goal_progress,
-                'total_debt_remaining': sum(float(debt['current_balance']) for debt in current_debts)
-            })
-        
-        return projection
+                'total_debt_remaining': sum(balances)
+            }
+            if detail_months is not None and month > detail_months:
+                del row['debt_payments']
+            metrics.increment('planner_months_simulated_total', stage='projection')
+            yield row
+    
+    def apply_goal_progress(self, projection, debts, goals):
+        """Add goal progress to each projected month without touching the (memoized) rows"""
+        return list(self.iter_goal_progress(projection, debts, goals))
+    
+    def iter_goal_progress(self, projection, debts, goals):
+        """Yield projected months with goal progress added"""
+        initial_debt = sum(debt.initial_balance for debt in debts)
+        for row in projection:
+            yield {**row, 'goal_progress': self.check_goal_progress(
+                goals, row['current_balance'], row['month'], initial_debt, row['total_debt_remaining']
+            )}
     
-    def calculate_monthly_debt_payments(self, debts, monthly_income, monthly_expenses):
-        """Calculate debt payments using avalanche method"""
+    def calculate_monthly_debt_payments(self, debts, monthly_income, monthly_expenses, balances=None):
+        """Calculate debt payments using avalanche method, in the same order as debts"""
+        if balances is None:
+            balances = [debt.current_balance for debt in debts]
         available_for_debt = monthly_income - monthly_expenses
-        total_min_payments = sum(float(debt['minimum_payment']) for debt in debts)
+        total_min_payments = sum(debt.minimum_payment for debt in debts)
         extra_payment = available_for_debt - total_min_payments
         
+        if not debts:
+            return []
         if extra_payment < 0:
-            # Can't even make minimum payments
-            return [{'name': debt['name'], 'amount': min(float(debt['minimum_payment']), available_for_debt / len(debts)), 'principal': 0} for debt in debts]
+            # Can't even make minimum payments; nothing is paid when expenses exceed income
+            share = max(available_for_debt, 0) / len(debts)
+            # Shortfall payments are booked as interest only, so balances do not move
+            return [
+                {'name': debt.name, 'amount': amount, 'principal': 0, 'interest': amount}
+                for debt, amount in ((debt, min(debt.minimum_payment, share)) for debt in debts)
+            ]
         
         # Sort debts by interest rate (avalanche method)
-        sorted_debts = sorted(debts, key=lambda x: float(x['interest_rate']), reverse=True)
+        sorted_indexes = sorted(range(len(debts)), key=lambda i: debts[i].interest_rate, reverse=True)
         
-        payments = []
+        payments = [None] * len(debts)
         remaining_extra = extra_payment
         
-        for debt in sorted_debts:
-            min_payment = float(debt['minimum_payment'])
-            current_balance = float(debt['current_balance'])
+        for i in sorted_indexes:
+            debt = debts[i]
+            min_payment = debt.minimum_payment
+            current_balance = balances[i]
             
             # Calculate how much extra we can pay on this debt
             extra_on_this_debt = min(remaining_extra, current_balance - min_payment)
             total_payment = min_payment + extra_on_this_debt
             
             # Calculate principal payment (simplified)
-            interest = current_balance * float(debt['interest_rate']) / 100 / 12
+            interest = current_balance * monthly_rate(debt.interest_rate)
             principal = total_payment - interest
             
-            payments.append({
-                'name': debt['name'],
+            payments[i] = {
+                'name': debt.name,
                 'amount': total_payment,
                 'principal': principal,
                 'interest': interest
-            })
+            }
             
             remaining_extra -= extra_on_this_debt
         
         return payments
     
-    def check_goal_progress(self, goals, current_balance, current_month, current_debts):
+    def check_goal_progress(self, goals, current_balance, current_month, initial_debt, current_debt):
         """Check progress towards financial goals"""
         progress = []
         
         for goal in goals:
-            goal_type = goal.get('type', 'savings')
-            target_amount = float(goal.get('target_amount', 0))
-            target_month = goal.get('target_month', 12)
+            target_amount = goal.target_amount
+            target_month = goal.target_month
             
-            if goal_type == 'savings':
+            if goal.type == 'savings':
                 progress_percentage = min(100, (current_balance / target_amount) * 100) if target_amount > 0 else 0
                 on_track = current_balance >= (target_amount * current_month / target_month)
-            elif goal_type == 'debt_payoff':
-                initial_debt = sum(float(debt.get('initial_balance', debt['current_balance'])) for debt in current_debts)
-                current_debt = sum(float(debt['current_balance']) for debt in current_debts)
+                current_value = current_balance
+            elif goal.type == 'debt_payoff':
                 progress_percentage = min(100, ((initial_debt - current_debt) / initial_debt) * 100) if initial_debt > 0 else 0
                 on_track = current_debt <= (initial_debt * (1 - current_month / target_month))
+                current_value = initial_debt - current_debt
             else:
                 progress_percentage = 0
                 on_track = False
+                current_value = 0
             
             progress.append({
-                'name': goal.get('name', 'Goal'),
-                'type': goal_type,
+                'name': goal.name,
+                'type': goal.type,
                 'target_amount': target_amount,
                 'target_month': target_month,
                 'progress_percentage': progress_percentage,
                 'on_track': on_track,
-                'current_value': current_balance if goal_type == 'savings' else (initial_debt - current_debt) if goal_type == 'debt_payoff' else 0
+                'current_value': current_value
             })
         
         return progress
     
-    def calculate_debt_strategies(self, monthly_income, debts, available_funds):
+    def calculate_debt_strategies(self, monthly_income, debts, available_funds, solver='stepper', max_months=120,
+                                  current_savings=0, emergency_fund_target=0, emergency_fund_share=0):
         """Calculate different debt payoff strategies"""
-        strategies = {}
+        orderings = [
+            ('avalanche', sorted(debts, key=lambda x: x.interest_rate, reverse=True), 'avalanche'),
+            ('snowball', sorted(debts, key=lambda x: x.current_balance), 'snowball'),
+            ('equal_payment', debts, 'equal')
+        ]
+        strategies = self.simulate_debt_payoff_batch(orderings, available_funds, solver, max_months)
+        strategies['optimal'] = self.calculate_optimal_strategy(
+            debts, available_funds, max_months, current_savings, emergency_fund_target, emergency_fund_share
+        )
+        return strategies
+    
+    def calculate_optimal_strategy(self, debts, available_funds, max_months=120, current_savings=0,
+                                   emergency_fund_target=0, emergency_fund_share=0):
+        """Calculate the interest-minimizing allocation honouring minimums, priorities and the emergency fund"""
+        from optimizer import optimize_payoff_batch
         
-        # Avalanche method
-        avalanche_result = self.calculate_avalanche_strategy(monthly_income, debts, available_funds)
-        strategies['avalanche'] = avalanche_result
+        # Same debt budget as avalanche and snowball: every minimum plus the available funds
+        budget = max(available_funds, 0) + sum(debt.minimum_payment for debt in debts)
+        months, total_interest, payments, saved, truncated = optimize_payoff_batch(
+            [[debt.current_balance for debt in debts]],
+            [[debt.interest_rate for debt in debts]],
+            [[debt.minimum_payment for debt in debts]],
+            [[debt.priority for debt in debts]],
+            budget, current_savings, emergency_fund_target, max_months, emergency_fund_share
+        )
+        self.record_payoff_metrics('optimal', months, max_months, len(debts))
+        if truncated:
+            metrics.increment('planner_truncated_total', stage='optimal')
+        return {
+            'months_to_payoff': int(months[0]),
+            'total_interest': round(float(total_interest[0]), 2),
+            'strategy': 'optimal',
+            'first_month_payments': [
+                {'name': debt.name, 'amount': round(float(amount), 2)} for debt, amount in zip(debts, payments[0])
+            ],
+            # Surplus diverted to savings instead of debts (emergency_fund_share)
+            'saved_to_emergency_fund': round(float(saved[0]), 2),
+            'truncated': truncated
+        }
+    
+    def simulate_debt_payoff_batch(self, orderings, available_funds, solver='stepper', max_months=120):
+        """Simulate several strategies at once on the vectorized or event-driven engine
+
+        Small profiles (SCALAR_PAYOFF_MAX_DEBTS debts or fewer) run on the
+        reference stepper instead, whichever solver is asked for; all three
+        give the same results.
+        """
+        if all(len(ordered) <= SCALAR_PAYOFF_MAX_DEBTS for _, ordered, _ in orderings):
+            return {
+                key: self.simulate_debt_payoff(ordered, 0, available_funds, strategy, max_months)
+                for key, ordered, strategy in orderings
+            }
         
-        # Snowball method
-        snowball_result = self.calculate_snowball_strategy(monthly_income, debts, available_funds)
-        strategies['snowball'] = snowball_result
+        balances = [[debt.current_balance for debt in ordered] for _, ordered, _ in orderings]
+        rates = [[debt.interest_rate for debt in ordered] for _, ordered, _ in orderings]
+        minimums = [[debt.minimum_payment for debt in ordered] for _, ordered, _ in orderings]
+        ordered = [strategy != 'equal' for _, _, strategy in orderings]
         
-        # Equal payment method
-        equal_result = self.calculate_equal_payment_strategy(monthly_income, debts, available_funds)
-        strategies['equal_payment'] = equal_result
+        solve = getattr(importlib.import_module('engine'), PAYOFF_SOLVERS[solver])
+        months, total_interest = solve(balances, rates, minimums, [available_funds] * len(orderings), max_months, ordered)
+        self.record_payoff_metrics(solver, months, max_months, sum(len(row) for row in balances))
         
-        return strategies
+        return {
+            key: {
+                'months_to_payoff': int(months[i]),
+                'total_interest': round(float(total_interest[i]), 2),
+                'strategy': strategy
+            }
+            for i, (key, _, strategy) in enumerate(orderings)
+        }
+    
+    def record_payoff_metrics(self, stage, months, max_months, debts_processed):
+        """Count simulated months, debts and early exits for a batch of payoff simulations"""
+        metrics.increment('planner_months_simulated_total', int(sum(months)), stage=stage)
+        metrics.increment('planner_debts_processed_total', debts_processed, stage=stage)
+        metrics.increment('planner_early_exits_total', sum(1 for month in months if month < max_months), stage=stage)
     
     def calculate_avalanche_strategy(self, monthly_income, debts, available_funds):
         """Calculate avalanche method results"""
-        sorted_debts = sorted(debts, key=lambda x: float(x['interest_rate']), reverse=True)
+        sorted_debts = sorted(debts, key=lambda x: x.interest_rate, reverse=True)
         return self.simulate_debt_payoff(sorted_debts, monthly_income, available_funds, 'avalanche')
     
     def calculate_snowball_strategy(self, monthly_income, debts, available_funds):
         """Calculate snowball method results"""
-        sorted_debts = sorted(debts, key=lambda x: float(x['current_balance']))
+        sorted_debts = sorted(debts, key=lambda x: x.current_balance)
         return self.simulate_debt_payoff(sorted_debts, monthly_income, available_funds, 'snowball')
     
     def calculate_equal_payment_strategy(self, monthly_income, debts, available_funds):
         """Calculate equal payment method results"""
         return self.simulate_debt_payoff(debts, monthly_income, available_funds, 'equal')
     
-    def simulate_debt_payoff(self, debts, monthly_income, available_funds, strategy):
-        """Simulate debt payoff for a given strategy"""
-        current_debts = [debt.copy() for debt in debts]
+    def simulate_debt_payoff(self, debts, monthly_income, available_funds, strategy, max_months=120):
+        """Simulate debt payoff for a given strategy (month-by-month reference stepper)
+
+        Equal splits available_funds across the open debts; avalanche and
+        snowball spend it, plus the minimums paid-off debts no longer need,
+        on the debts in the order given.
+        """
+        balances = [debt.current_balance for debt in debts]
+        ordered = strategy != 'equal'
+        stuck = [debt.minimum_payment <= balance * monthly_rate(debt.interest_rate)
+                 for debt, balance in zip(debts, balances) if balance > 0]
+        rollover = ordered and (not all(stuck) or any(
+            debt.minimum_payment > 0 for debt, balance in zip(debts, balances) if balance <= 0
+        ))
+        
+        # A debt whose minimum never covers its interest keeps the loop going to max_months,
+        # so without extra funds to redistribute, solve it in closed form instead
+        if available_funds <= 0 and any(stuck) and not rollover:
+            from engine import solve_payoff_events
+            
+            months, total_interest = solve_payoff_events(
+                [balances], [debt.interest_rate for debt in debts], [debt.minimum_payment for debt in debts], [0], max_months
+            )
+            self.record_payoff_metrics('reference', months, max_months, len(debts))
+            return {
+                'months_to_payoff': int(months[0]),
+                'total_interest': round(float(total_interest[0]), 2),
+                'strategy': strategy
+            }
         total_interest = 0
         months_to_payoff = 0
         
-        while any(float(debt['current_balance']) > 0 for debt in current_debts) and months_to_payoff < 120:
+        while any(balance > 0 for balance in balances) and months_to_payoff < max_months:
             months_to_payoff += 1
             monthly_interest = 0
+            extra_funds = max(available_funds, 0)
+            if ordered:
+                # Minimums a debt no longer needs go on top, so the total spent stays fixed
+                extra_funds += sum(
+                    debt.minimum_payment if balance <= 0
+                    else max(debt.minimum_payment - balance * (1 + monthly_rate(debt.interest_rate)), 0)
+                    for debt, balance in zip(debts, balances)
+                )
             
-            # Calculate minimum payments
-            total_min_payments = sum(float(debt['minimum_payment']) for debt in current_debts)
-            extra_funds = available_funds
-            
-            for debt in current_debts:
-                if float(debt['current_balance']) > 0:
+            for i, debt in enumerate(debts):
+                if balances[i] > 0:
                     # Calculate interest
-                    interest = float(debt['current_balance']) * float(debt['interest_rate']) / 100 / 12
+                    interest = balances[i] * monthly_rate(debt.interest_rate)
                     monthly_interest += interest
                     
                     # Calculate payment
-                    min_payment = float(debt['minimum_payment'])
                     if strategy == 'equal' and extra_funds > 0:
-                        extra_payment = extra_funds / len([d for d in current_debts if float(d['current_balance']) > 0])
-                        payment = min_payment + extra_payment
+                        extra_payment = extra_funds / sum(1 for balance in balances if balance > 0)
+                        payment = debt.minimum_payment + extra_payment
+                    elif ordered and extra_funds > 0:
+                        extra_payment = min(extra_funds, max(balances[i] + interest - debt.minimum_payment, 0))
+                        extra_funds -= extra_payment
+                        payment = debt.minimum_payment + extra_payment
                     else:
-                        payment = min_payment
+                        payment = debt.minimum_payment
                     
                     # Update balance
-                    new_balance = float(debt['current_balance']) + interest - payment
-                    debt['current_balance'] = max(0, new_balance)
+                    balance = balances[i] + interest - payment
+                    balances[i] = balance if balance > CLEARED_BALANCE else 0
             
             total_interest += monthly_interest
         
+        self.record_payoff_metrics('reference', [months_to_payoff], max_months, len(debts))
         return {
             'months_to_payoff': months_to_payoff,
             'total_interest': round(total_interest, 2),
@@ -360,7 +619,7 @@ class ComprehensiveFinancialPlanner:
             })
         
         # Debt recommendations
-        total_debt = sum(float(debt['current_balance']) for debt in debts)
+        total_debt = sum(debt.current_balance for debt in debts)
         debt_to_income_ratio = total_debt / monthly_income if monthly_income > 0 else 0
         
         if debt_to_income_ratio > 0.5:
@@ -383,24 +642,24 @@ class ComprehensiveFinancialPlanner:
             })
         
         # Expense optimization
-        high_expenses = [exp for exp in expenses if float(exp.get('amount', 0)) > monthly_income * 0.3]
+        high_expenses = [exp for exp in expenses if exp.amount > monthly_income * 0.3]
         if high_expenses:
             recommendations.append({
                 'type': 'expenses',
                 'priority': 'medium',
                 'title': 'High Expense Categories',
-                'description': 'Consider reducing expenses in: {}'.format(", ".join([exp["category"] for exp in high_expenses])),
+                'description': 'Consider reducing expenses in: {}'.format(", ".join([exp.category for exp in high_expenses])),
                 'action': 'Look for ways to reduce these expenses by 10-20%'
             })
         
         # Goal recommendations
         for goal in goals:
-            if goal.get('type') == 'savings' and float(goal.get('target_amount', 0)) > current_savings * 2:
+            if goal.type == 'savings' and goal.target_amount > current_savings * 2:
                 recommendations.append({
                     'type': 'goals',
                     'priority': 'medium',
                     'title': 'Large Savings Goal',
-                    'description': 'Your goal "{}" requires significant savings.'.format(goal.get("name")),
+                    'description': 'Your goal "{}" requires significant savings.'.format(goal.name),
                     'action': 'Consider breaking it into smaller, more achievable milestones'
                 })
         
@@ -464,6 +723,258 @@ class ComprehensiveFinancialPlanner:
 
 # Initialize the planner
 planner = ComprehensiveFinancialPlanner()
+_plan_store = None
+
+def get_plan_store():
+    """Lazily open the plan store (and migrate debt_planner.db) on first use"""
+    global _plan_store
+    if _plan_store is None:
+        _plan_store = create_plan_store()
+    return _plan_store
+
+plan_cache = create_plan_cache(get_plan_store)
+# Static, so serialized once instead of on every request
+EXPENSE_CATEGORIES_JSON = app.json.dumps(planner.expense_categories)
+runtime_config = RuntimeConfig()
+profiler = SamplingProfiler()
+_batch_executor = None
+# Latest own_cache_stats() from each plan worker, by pid (asgi.py)
+_worker_cache_stats = {}
+
+def own_cache_stats():
+    """This process's plan cache and factor cache stats"""
+    return {'plan_cache': plan_cache.stats() if plan_cache else None, 'factors': factor_cache_stats()}
+
+def cache_stats():
+    """Plan and factor cache stats summed over this process and every plan worker that has reported
+
+    Memory plan caches are per process, so their sizes add up; the sqlite
+    backend is one shared table.
+    """
+    reports = [own_cache_stats()] + list(_worker_cache_stats.values())
+    combined = {'processes': len(reports)}
+    if plan_cache is None:
+        combined['backend'] = 'off'
+    else:
+        plans = [report['plan_cache'] for report in reports if report['plan_cache']]
+        combined.update(_sum_stats(plans, ('hits', 'misses')), size=(
+            max if plans[0]['backend'] == 'sqlite' else sum
+        )(stats['size'] for stats in plans))
+    combined['factors'] = {
+        name: _sum_stats([report['factors'][name] for report in reports], ('hits', 'misses', 'size'))
+        for name in reports[0]['factors']
+    }
+    return combined
+
+def _sum_stats(stats, fields):
+    """The first stats dict with fields summed over all of them and hit_ratio recomputed"""
+    total = dict(stats[0])
+    for field in fields:
+        total[field] = sum(item[field] for item in stats)
+    lookups = total['hits'] + total['misses']
+    total['hit_ratio'] = total['hits'] / lookups if lookups else 0
+    return total
+
+def get_batch_executor():
+    """Lazily start the process pool used for batch planning under python main.py"""
+    global _batch_executor
+    if _batch_executor is None:
+        # Spawned, not forked: the server is already running request threads
+        _batch_executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _batch_executor
+
+def plan_batch_item(profile):
+    """Plan a single batch item, reporting failures instead of raising"""
+    try:
+        if isinstance(profile, str):
+            profile = json.loads(profile)
+        return {'result': planner.calculate_comprehensive_plan(FinancialProfile.parse(profile))}
+    except ValidationError as e:
+        return {'error': 'Invalid financial data', 'fields': e.errors}
+    except Exception as e:
+        return {'error': str(e)}
+
+def plan_batch_request(profiles, start=0):
+    """Plan a run of batch items numbered from start, returning (status, headers, NDJSON lines)"""
+    lines = [json.dumps({'index': start + i, **plan_batch_item(profile)}) + '\n' for i, profile in enumerate(profiles)]
+    return 200, {}, ''.join(lines)
+
+def parse_batch(body, mimetype):
+    """Split a /calculate-plan-batch body into profiles, returning (profiles, error message)"""
+    # NDJSON lines are handed to the workers undecoded so parsing runs in parallel too
+    if mimetype in ('application/x-ndjson', 'application/jsonl'):
+        profiles = [line for line in body.decode('utf-8', 'replace').splitlines() if line.strip()]
+    else:
+        try:
+            profiles = json.loads(body) if body else None
+        except ValueError:
+            profiles = None
+        if not isinstance(profiles, list):
+            return None, 'Expected a JSON array or NDJSON of financial profiles'
+    if len(profiles) > MAX_BATCH_PROFILES:
+        return None, 'Batch has {} profiles, at most {} allowed'.format(len(profiles), MAX_BATCH_PROFILES)
+    return profiles, None
+
+WARM_UP_PROFILE = {
+    'monthly_income': 5000,
+    'debts': [
+        {'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90},
+        {'name': 'Car', 'current_balance': 12000, 'interest_rate': 6.5, 'minimum_payment': 280}
+    ],
+    'expenses': [{'category': 'housing', 'amount': 1500}]
+}
+_ready_at = None
+_warm_up_lock = threading.Lock()
+
+def warm_up():
+    """Import the numeric engines and plan a small profile so the first real request is not the slow one"""
+    global _ready_at
+    with _warm_up_lock:
+        if _ready_at is not None:
+            return
+        for module in NUMERIC_MODULES:
+            importlib.import_module(module)
+        for solver in PAYOFF_SOLVERS:
+            planner.calculate_comprehensive_plan(FinancialProfile.parse({**WARM_UP_PROFILE, 'payoff_solver': solver}))
+        _ready_at = time.perf_counter()
+
+def startup_report():
+    """Seconds from the start of the import to loaded and to warm, with resident memory at each point"""
+    return {
+        'ready': _ready_at is not None,
+        'import_seconds': round(IMPORTED_AT - STARTED_AT, 3),
+        'ready_seconds': round(_ready_at - STARTED_AT, 3) if _ready_at is not None else None,
+        'import_rss_bytes': IMPORT_RSS_BYTES,
+        'rss_bytes': resident_memory_bytes()
+    }
+
+def apply_runtime_config():
+    """Switch the sampling profiler on or off to match the mounted config and return the config"""
+    config = runtime_config.get()
+    profiler_config = config.get('profiler') or {}
+    if profiler_config.get('enabled'):
+        profiler.start(profiler_config.get('interval_ms', 10) / 1000)
+    elif profiler.running:
+        profiler.stop()
+    return config
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': 'Request body too large', 'limit_bytes': MAX_BODY_BYTES}), 413
+
+@app.before_request
+def start_request_metrics():
+    config = apply_runtime_config()
+    g.request_started = time.perf_counter()
+    g.server_timing = config.get('server_timing', SERVER_TIMING)
+    metrics.start_request()
+
+@app.after_request
+def finish_request_metrics(response):
+    timings = metrics.finish_request()
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.increment('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    if g.get('server_timing'):
+        timings.append(('total', time.perf_counter() - g.request_started))
+        response.headers['Server-Timing'] = server_timing(timings)
+    return response
+
+def load_body(body):
+    """Decode a raw JSON request body, or None when it is empty or malformed"""
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+def worker_request(handler, *args):
+    """Run handler(*args) in a plan worker process for asgi.py
+
+    Returns handler's (status, headers, body) plus this request's stage
+    timings and a report for merge_worker_report: everything the worker's
+    metrics and profiler recorded since its last request, and its cache
+    stats so far.
+    """
+    apply_runtime_config()
+    metrics.start_request()
+    status, headers, payload = handler(*args)
+    report = {
+        'pid': os.getpid(),
+        'metrics': metrics.drain(),
+        'profile': profiler.drain(),
+        'caches': own_cache_stats()
+    }
+    return status, headers, payload, metrics.finish_request(), report
+
+def merge_worker_report(report):
+    """Fold a plan worker's report from worker_request into this process's metrics, profile and cache stats"""
+    metrics.merge(report['metrics'])
+    profiler.merge(report['profile'])
+    # Cache stats are running totals per worker, so the latest report replaces the previous one
+    _worker_cache_stats[report['pid']] = report['caches']
+
+def plan_request(body, args=None, accept=None):
+    """Plan a raw /calculate-plan body off the request thread, returning (status, headers, body)"""
+    try:
+        with metrics.stage('parse'):
+            profile = FinancialProfile.parse(load_body(body))
+            plan_format = parse_format(args or {})
+    except ValidationError as e:
+        return 400, {}, app.json.dumps({'error': 'Invalid financial data', 'fields': e.errors})
+    
+    try:
+        result, hit = plan_profile(profile)
+        payload, mimetype = render_plan(result, plan_format, accept)
+    except ImportError:
+        return 406, {}, app.json.dumps({'error': 'msgpack responses are not available on this server'})
+    except Exception as e:
+        return 500, {}, app.json.dumps({'error': str(e)})
+    headers = {'Content-Type': mimetype, 'Vary': 'Accept'}
+    if hit is not None:
+        headers['X-Plan-Cache'] = 'hit' if hit else 'miss'
+    return 200, headers, payload
+
+def monte_carlo_request(body, get_executor=None):
+    """Simulate a raw /monte-carlo body, returning (status, headers, body)
+
+    get_executor is only called (to spread chunks over its pool) when the
+    request asks for more than one worker.
+    """
+    data = load_body(body)
+    try:
+        profile = FinancialProfile.parse(data)
+        settings = MonteCarloSettings.parse(data.get('simulation'))
+    except ValidationError as e:
+        return 400, {}, app.json.dumps({'error': 'Invalid financial data', 'fields': e.errors})
+    
+    try:
+        from montecarlo import run_monte_carlo
+        
+        executor = get_executor() if get_executor is not None and settings.workers > 1 else None
+        with metrics.stage('monte_carlo'):
+            return 200, {}, app.json.dumps(run_monte_carlo(profile, settings, executor))
+    except Exception as e:
+        return 500, {}, app.json.dumps({'error': str(e)})
+
+def sweep_request(body):
+    """Run a raw /sweep body, returning (status, headers, body)"""
+    data = load_body(body)
+    try:
+        profile = FinancialProfile.parse(data)
+        settings = SweepSettings.parse(data.get('sweep'), profile)
+    except ValidationError as e:
+        return 400, {}, app.json.dumps({'error': 'Invalid financial data', 'fields': e.errors})
+    
+    try:
+        from sweep import run_sweep
+        
+        with metrics.stage('sweep'):
+            return 200, {}, app.json.dumps(run_sweep(profile, settings))
+    except Exception as e:
+        return 500, {}, app.json.dumps({'error': str(e)})
+
+def json_response(status, headers, payload):
+    """Turn a (status, headers, body) triple from the *_request functions into a Flask response"""
+    return Response(payload, status, headers, mimetype='application/json')
 
 @app.route("/", methods=["GET"])
 def index():
@@ -472,15 +983,212 @@ def index():
 @app.route("/calculate-plan", methods=["POST"])
 def calculate_plan():
     try:
-        data = request.get_json()
-        result = planner.calculate_comprehensive_plan(data)
-        return jsonify(result)
+        with metrics.stage('parse'):
+            profile = FinancialProfile.parse(request.get_json(silent=True))
+            plan_format = parse_format(request.args)
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid financial data', 'fields': e.errors}), 400
+    
+    # Long projections can be streamed month by month instead of built in memory (bypasses the cache)
+    stream = request.args.get('stream')
+    if stream is None and request.accept_mimetypes.best == 'application/x-ndjson':
+        stream = 'ndjson'
+    if stream == 'ndjson':
+        return Response(stream_plan_ndjson(profile), mimetype='application/x-ndjson')
+    if stream == 'json':
+        return Response(stream_plan_json(profile), mimetype='application/json')
+    if stream is not None:
+        return jsonify({'error': 'Invalid financial data', 'fields': {'stream': 'must be one of: ndjson, json'}}), 400
+    
+    try:
+        result, hit = plan_profile(profile)
+        with metrics.stage('serialize'):
+            payload, mimetype = render_plan(result, plan_format, request.headers.get('Accept'))
+        response = Response(payload, mimetype=mimetype)
+        response.vary.add('Accept')
+        if hit is not None:
+            response.headers['X-Plan-Cache'] = 'hit' if hit else 'miss'
+        return response
+    except ImportError:
+        return jsonify({'error': 'msgpack responses are not available on this server'}), 406
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def plan_profile(profile):
+    """Return (result, hit) for a profile, going through the plan cache when one is configured (hit is None without)
+
+    The memo trace describes this request, so it is kept out of the cached
+    result and attached afterwards; a cache hit reports "plan_cache": "hit".
+    """
+    if plan_cache is None:
+        result = planner.calculate_comprehensive_plan(profile)
+        return {**result, 'memo': {'plan_cache': 'off', **result['memo']}}, None
+    
+    traces = []
+    
+    def compute(profile):
+        result = planner.calculate_comprehensive_plan(profile)
+        traces.append(result.pop('memo'))
+        return result
+    
+    result, hit = plan_cache.get_or_compute(profile, compute)
+    memo = {'plan_cache': 'hit', 'memo': [], 'computed': []} if hit else {'plan_cache': 'miss', **traces[0]}
+    return {**result, 'memo': memo}, hit
+
+def render_plan(result, plan_format, accept):
+    """Apply the fields/layout/precision format and encode as JSON or msgpack, returning (body, mimetype)"""
+    return encode(shape_plan(result, *plan_format), wants_msgpack(accept), app.json.dumps)
+
+def stream_plan_ndjson(profile):
+    """Yield one {"type", "data"} line per plan section and per projected month"""
+    try:
+        for section, payload in planner.stream_comprehensive_plan(profile):
+            yield json.dumps({'type': section, 'data': payload}) + '\n'
+    except Exception as e:
+        yield json.dumps({'type': 'error', 'data': {'error': str(e)}}) + '\n'
+
+def stream_plan_json(profile):
+    """Yield the regular plan JSON in chunks, writing the projection array month by month"""
+    in_projection = False
+    yield '{'
+    for section, payload in planner.stream_comprehensive_plan(profile):
+        if section == 'month':
+            yield (', ' if in_projection else '"projection": [') + json.dumps(payload)
+            in_projection = True
+            continue
+        if in_projection:
+            yield '], '
+            in_projection = False
+        yield '{}: {}{}'.format(json.dumps(section), json.dumps(payload), '' if section == 'expense_breakdown' else ', ')
+    yield '}'
+
+@app.route("/cache-stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify(cache_stats())
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    extra = [('planner_profiler_running', 'gauge', 'Whether the sampling profiler is on', [((), int(profiler.running))])]
+    stats = cache_stats()
+    factors = stats['factors']
+    if plan_cache is not None:
+        labels = (('backend', stats['backend']),)
+        extra += [
+            ('plan_cache_hits_total', 'counter', 'Plan cache hits', [(labels, stats['hits'])]),
+            ('plan_cache_misses_total', 'counter', 'Plan cache misses', [(labels, stats['misses'])]),
+            ('plan_cache_entries', 'gauge', 'Plans currently cached', [(labels, stats['size'])])
+        ]
+    extra += [
+        ('factor_cache_hits_total', 'counter', 'Interest factor cache hits',
+         [((('cache', name),), stats['hits']) for name, stats in factors.items()]),
+        ('factor_cache_misses_total', 'counter', 'Interest factor cache misses',
+         [((('cache', name),), stats['misses']) for name, stats in factors.items()]),
+        ('factor_cache_entries', 'gauge', 'Interest factors currently cached',
+         [((('cache', name),), stats['size']) for name, stats in factors.items()])
+    ]
+    startup = startup_report()
+    extra += [
+        ('process_startup_seconds', 'gauge', 'Seconds from the start of the import to each startup phase',
+         [((('phase', phase),), startup[phase + '_seconds']) for phase in ('import', 'ready')
+          if startup[phase + '_seconds'] is not None]),
+        ('process_resident_memory_bytes', 'gauge', 'Resident memory of this process', [((), startup['rss_bytes'])])
+    ]
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@app.route("/debug/profile", methods=["GET"])
+def get_profile():
+    """Collapsed stacks sampled so far (flamegraph.pl format); ?reset=1 clears them"""
+    return Response(profiler.collapsed(reset=request.args.get('reset') == '1'), mimetype='text/plain')
+
+@app.route("/plans", methods=["POST"])
+@app.route("/plans/<int:plan_id>", methods=["PUT"])
+def save_plan(plan_id=None):
+    data = request.get_json(silent=True)
+    try:
+        profile = FinancialProfile.parse(data)
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid financial data', 'fields': e.errors}), 400
+    name = data.get('name') or None
+    if name is not None and not isinstance(name, str):
+        return jsonify({'error': 'Invalid financial data', 'fields': {'name': 'must be a string'}}), 400
+    
+    try:
+        result, _ = plan_profile(profile)
+        saved = get_plan_store().save_plan(profile, result, name, plan_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if saved is None:
+        return jsonify({'error': 'Plan not found'}), 404
+    saved_id, result_id = saved
+    return jsonify({'id': saved_id, 'result_id': result_id, 'result': result}), 201 if plan_id is None else 200
+
+@app.route("/plans", methods=["GET"])
+def list_plans():
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return jsonify(get_plan_store().list_plans(max(1, min(limit, 500)), max(offset, 0)))
+
+@app.route("/plans/<int:plan_id>", methods=["GET"])
+def load_plan(plan_id):
+    plan = get_plan_store().load_plan(plan_id)
+    if plan is None:
+        return jsonify({'error': 'Plan not found'}), 404
+    return jsonify(plan)
+
+@app.route("/calculate-plan-batch", methods=["POST"])
+def calculate_plan_batch():
+    profiles, error = parse_batch(request.get_data(), request.mimetype)
+    if error is not None:
+        return jsonify({'error': error}), 400
+    
+    results = get_batch_executor().map(plan_batch_item, profiles, chunksize=BATCH_CHUNKSIZE)
+    
+    def generate():
+        for index, item in enumerate(results):
+            yield json.dumps({'index': index, **item}) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route("/monte-carlo", methods=["POST"])
+def monte_carlo():
+    return json_response(*monte_carlo_request(request.get_data(), get_batch_executor))
+
+@app.route("/sweep", methods=["POST"])
+def sweep():
+    return json_response(*sweep_request(request.get_data()))
+
+@app.route("/allocate", methods=["POST"])
+def allocate_funds():
+    try:
+        allocation_request = AllocationRequest.parse(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid allocation data', 'fields': e.errors}), 400
+    
+    try:
+        from allocator import allocate
+        
+        with metrics.stage('allocate'):
+            return jsonify(allocate(allocation_request))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route("/expense-categories", methods=["GET"])
 def get_expense_categories():
-    return jsonify(planner.expense_categories)
+    return Response(EXPENSE_CATEGORIES_JSON, mimetype='application/json')
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({'status': 'ok'})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    report = startup_report()
+    return jsonify(report), 200 if report['ready'] else 503
+
+# Everything above is loaded; the rest of startup happens in warm_up
+IMPORTED_AT = time.perf_counter()
+IMPORT_RSS_BYTES = resident_memory_bytes()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    warm_up()
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -0,0 +1,262 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONFIG_PATH = os.environ.get('CONFIG_PATH', '/configs/config.json')
+# How often the mounted config is re-read at most; configmap updates land within a minute anyway
+CONFIG_RELOAD_SECONDS = float(os.environ.get('CONFIG_RELOAD_SECONDS', 5))
+
+
+class Metrics:
+    """Process-local stage timers and counters rendered in the Prometheus text format
+
+    Stage timings are also collected per request (per thread) while a
+    request trace is open, for the Server-Timing header.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one observation of stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stage['buckets'][i] += 1
+            stage['sum'] += seconds
+            stage['count'] += 1
+
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def start_request(self):
+        self._local.timings = []
+
+    def finish_request(self):
+        """Close the current thread's request trace and return its (stage, seconds) list"""
+        timings = getattr(self._local, 'timings', None) or []
+        self._local.timings = None
+        return timings
+
+    def drain(self):
+        """Return and reset the counters and stage histograms, for another process to merge"""
+        with self._lock:
+            drained = {'counters': self._counters, 'stages': self._stages}
+            self._counters = {}
+            self._stages = {}
+        return drained
+
+    def merge(self, drained):
+        """Add counters and stage histograms drained from another process"""
+        with self._lock:
+            for key, value in drained['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, other in drained['stages'].items():
+                stage = self._stages.get(name)
+                if stage is None:
+                    stage = self._stages[name] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                stage['buckets'] = [count + extra for count, extra in zip(stage['buckets'], other['buckets'])]
+                stage['sum'] += other['sum']
+                stage['count'] += other['count']
+
+    def render(self, extra=()):
+        """Prometheus exposition text; extra is (name, type, help, [(labels, value)]) families to append"""
+        with self._lock:
+            counters = dict(self._counters)
+            stages = {name: dict(stage, buckets=list(stage['buckets'])) for name, stage in self._stages.items()}
+
+        lines = [
+            '# HELP planner_stage_seconds Time spent in each planner stage',
+            '# TYPE planner_stage_seconds histogram'
+        ]
+        for name, stage in sorted(stages.items()):
+            for bound, count in zip(self.buckets, stage['buckets']):
+                lines.append('planner_stage_seconds_bucket{{stage="{}",le="{}"}} {}'.format(name, bound, count))
+            lines.append('planner_stage_seconds_bucket{{stage="{}",le="+Inf"}} {}'.format(name, stage['count']))
+            lines.append('planner_stage_seconds_sum{{stage="{}"}} {}'.format(name, stage['sum']))
+            lines.append('planner_stage_seconds_count{{stage="{}"}} {}'.format(name, stage['count']))
+
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, []).append((labels, value))
+        for name in sorted(families):
+            lines.append('# HELP {} {}'.format(name, COUNTER_HELP.get(name, name)))
+            lines.append('# TYPE {} counter'.format(name))
+            for labels, value in sorted(families[name]):
+                lines.append('{}{} {}'.format(name, _labels(labels), value))
+
+        for name, metric_type, help_text, samples in extra:
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            for labels, value in samples:
+                lines.append('{}{} {}'.format(name, _labels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+COUNTER_HELP = {
+    'planner_months_simulated_total': 'Simulated months, summed over every scenario a stage ran',
+    'planner_debts_processed_total': 'Debts fed into each stage',
+    'planner_early_exits_total': 'Payoff simulations that finished before their month horizon',
+    'planner_truncated_total': 'Optimal-strategy runs cut short by their time budget',
+    'planner_memo_total': 'Plan sections served from the section memo or computed',
+    'http_requests_total': 'HTTP requests by endpoint and status code'
+}
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('"', '\\"')) for key, value in labels) + '}'
+
+
+def server_timing(timings):
+    """Format (stage, seconds) pairs as a Server-Timing header value, summing repeated stages"""
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ', '.join('{};dur={:.3f}'.format(name, seconds * 1000) for name, seconds in totals.items())
+
+
+def resident_memory_bytes():
+    """Current resident set size from /proc, or the peak from getrusage where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class SamplingProfiler:
+    """Samples every other thread's Python stack on a timer and aggregates collapsed stacks
+
+    The output (one "frame;frame;frame count" line per stack) feeds
+    flamegraph.pl or speedscope directly.
+    """
+
+    def __init__(self):
+        self.interval = 0.01
+        self.samples = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, interval=0.01):
+        self.interval = interval
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                stacks.append(';'.join(reversed(stack)))
+            with self._lock:
+                self.samples.update(stacks)
+
+    def drain(self):
+        """Return and reset the samples, for another process to merge"""
+        with self._lock:
+            samples = self.samples
+            self.samples = Counter()
+        return samples
+
+    def merge(self, samples):
+        """Add samples drained from another process"""
+        with self._lock:
+            self.samples.update(samples)
+
+    def collapsed(self, reset=False):
+        with self._lock:
+            samples = self.samples
+            if reset:
+                self.samples = Counter()
+        return ''.join('{} {}\n'.format(stack, count) for stack, count in samples.most_common())
+
+
+class RuntimeConfig:
+    """JSON config mounted from the configmap, re-read when the file changes"""
+
+    def __init__(self, path=CONFIG_PATH, reload_seconds=CONFIG_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.values = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current config values, reloading at most every reload_seconds"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return self.values
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                self.values, self._mtime = {}, None
+                return self.values
+            if mtime != self._mtime:
+                try:
+                    with open(self.path) as f:
+                        self.values = json.load(f)
+                except (OSError, ValueError):
+                    # Keep the last good config while the file is mid-update or malformed
+                    return self.values
+                self._mtime = mtime
+        return self.values
+
+
+metrics = Metrics()
@@ -0,0 +1,541 @@
+import math
+import re
+
+INCOME_CHANGE_TYPES = ('percentage', 'fixed', 'one_time')
+# The UI's "Major Purchase" goals are accepted but not tracked, as before
+GOAL_TYPES = ('savings', 'debt_payoff', 'purchase')
+PAYOFF_SOLVER_NAMES = ('stepper', 'events')
+MAX_PAYOFF_HORIZON_MONTHS = 600
+MAX_SIMULATION_PATHS = 100000
+MAX_PROJECTION_MONTHS = 480
+# Per-profile entity limits; every one of them multiplies the planner's work
+MAX_DEBTS = 500
+MAX_EXPENSES = 200
+MAX_INCOME_CHANGES = 100
+MAX_GOALS = 100
+# Projection cells (see projection_cells): each one is a per-month entry the projection computes and returns
+MAX_PROJECTION_CELLS = 24000
+# Bounds that keep every balance the engines compound over MAX_PAYOFF_HORIZON_MONTHS finite
+MAX_AMOUNT = 1e12
+MAX_INTEREST_RATE = 1000
+MAX_PERCENT_CHANGE = 1000
+MAX_WEIGHT = 1e6
+MAX_INCOME_VOLATILITY = 5
+MAX_RATE_VOLATILITY = 10
+SWEEP_STRATEGIES = ('optimal', 'equal_payment')
+MAX_SWEEP_VALUES = 200
+MAX_SWEEP_CELLS = 10000
+ALLOCATION_TARGET_TYPES = ('account', 'debt', 'goal')
+# Targets plus debts in one /allocate call; payroll splits run to a few thousand
+MAX_ALLOCATION_TARGETS = 20000
+# extra_funds, debts[i].interest_rate, income_changes[i].amount or income_changes[i].start_month
+SWEEP_PARAMETER = re.compile(r'^(?:extra_funds|debts\[(\d+)\]\.interest_rate|income_changes\[(\d+)\]\.(amount|start_month))$')
+
+# README priority levels; the React UI sends the names, API clients may send 1-5
+PRIORITY_LEVELS = {'critical': 1, 'high': 2, 'medium': 3, 'low': 4, 'minimal': 5}
+DEFAULT_PRIORITY = PRIORITY_LEVELS['medium']
+
+
+class ValidationError(ValueError):
+    """Raised when request data is invalid; errors maps field paths to messages"""
+
+    def __init__(self, errors):
+        super().__init__('Invalid financial data: ' + '; '.join(
+            '{}: {}'.format(field, message) for field, message in errors.items()
+        ))
+        self.errors = errors
+
+
+class Record:
+    """Immutable-by-convention value object stored in __slots__"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def key(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self):
+        """Plain JSON-ready dict, nested records included, in the shape parse() accepts"""
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash((type(self).__name__,) + self.key())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, getattr(self, name)) for name in self.__slots__
+        ))
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Debt(Record):
+    __slots__ = (
+        'name', 'current_balance', 'interest_rate', 'minimum_payment', 'initial_balance', 'priority', 'variable_rate'
+    )
+
+
+class Expense(Record):
+    __slots__ = ('category', 'amount')
+
+
+class IncomeChange(Record):
+    __slots__ = ('type', 'amount', 'start_month')
+
+
+class Goal(Record):
+    __slots__ = ('name', 'type', 'target_amount', 'target_month')
+
+
+class FinancialProfile(Record):
+    __slots__ = (
+        'monthly_income', 'current_savings', 'debts', 'expenses', 'income_changes', 'goals',
+        'emergency_fund_target', 'payoff_solver', 'payoff_horizon_months', 'projection_months',
+        'projection_detail_months', 'emergency_fund_share'
+    )
+
+    @classmethod
+    def parse(cls, data):
+        """Parse and validate request JSON once, raising ValidationError with every bad field"""
+        return _Parser().profile(data)
+
+    def projection_cells(self):
+        return projection_cells(self.projection_months, self.projection_detail_months, len(self.debts) + len(self.goals))
+
+
+def projection_cells(months, detail_months, items):
+    """Projected months plus the per-debt and per-goal entries they keep, the bulk of a plan's size"""
+    if detail_months is not None:
+        months_with_detail = min(months, detail_months)
+    else:
+        months_with_detail = months
+    return months + months_with_detail * items
+
+
+class MonteCarloSettings(Record):
+    __slots__ = (
+        'paths', 'months', 'seed', 'income_volatility', 'shock_probability', 'shock_amount',
+        'rate_volatility', 'workers'
+    )
+
+    @classmethod
+    def parse(cls, data):
+        """Parse the "simulation" block of a /monte-carlo request"""
+        return _Parser().monte_carlo(data)
+
+
+class SweepParameter(Record):
+    __slots__ = ('name', 'kind', 'index', 'values')
+
+
+class SweepSettings(Record):
+    __slots__ = ('parameters', 'strategy')
+
+    @classmethod
+    def parse(cls, data, profile):
+        """Parse the "sweep" block of a /sweep request against the already parsed profile"""
+        return _Parser().sweep(data, profile)
+
+
+class AllocationTarget(Record):
+    __slots__ = ('name', 'type', 'minimum', 'cap', 'priority', 'weight', 'enabled')
+
+
+class AllocationRequest(Record):
+    __slots__ = ('amount', 'keep_in_checking', 'targets', 'debts')
+
+    @classmethod
+    def parse(cls, data):
+        """Parse and validate an /allocate request"""
+        return _Parser().allocation(data)
+
+
+def month_income(monthly_income, income_changes, month):
+    """Income for a 1-based month after applying the planned income changes"""
+    income = monthly_income
+    for change in income_changes:
+        if change.start_month <= month:
+            if change.type == 'percentage':
+                income *= (1 + change.amount / 100)
+            elif change.type == 'fixed':
+                income += change.amount
+            elif change.type == 'one_time':
+                if change.start_month == month:
+                    income += change.amount
+    return income
+
+
+_MISSING = object()
+
+
+class _Parser:
+    """Collects field-level errors while converting request JSON into records"""
+
+    def __init__(self):
+        self.errors = {}
+
+    def profile(self, data):
+        if not isinstance(data, dict):
+            raise ValidationError({'': 'must be a JSON object'})
+
+        monthly_income = self.amount(data, 'monthly_income', 'monthly_income', default=0.0)
+        current_savings = self.amount(data, 'current_savings', 'current_savings', default=0.0, minimum=-MAX_AMOUNT)
+        default_target = monthly_income * 6 if monthly_income is not None else 0.0
+        emergency_fund_target = self.amount(data, 'emergency_fund_target', 'emergency_fund_target', default=default_target)
+
+        debts = tuple(
+            self.debt(item, 'debts[{}]'.format(i), i) for i, item in self.items(data, 'debts', MAX_DEBTS)
+        )
+        expenses = tuple(
+            self.expense(item, 'expenses[{}]'.format(i)) for i, item in self.items(data, 'expenses', MAX_EXPENSES)
+        )
+        income_changes = tuple(
+            self.income_change(item, 'income_changes[{}]'.format(i))
+            for i, item in self.items(data, 'income_changes', MAX_INCOME_CHANGES)
+        )
+        goals = tuple(self.goal(item, 'goals[{}]'.format(i), i) for i, item in self.items(data, 'goals', MAX_GOALS))
+
+        payoff_solver = self.choice(data, 'payoff_solver', 'payoff_solver', PAYOFF_SOLVER_NAMES, default='stepper')
+        payoff_horizon_months = self.integer(
+            data, 'payoff_horizon_months', 'payoff_horizon_months', default=120,
+            minimum=1, maximum=MAX_PAYOFF_HORIZON_MONTHS
+        )
+        projection_months = self.integer(
+            data, 'projection_months', 'projection_months', default=12, minimum=1, maximum=MAX_PROJECTION_MONTHS
+        )
+        # Months after this one omit the per-debt payment breakdown to keep long projections small
+        projection_detail_months = self.integer(
+            data, 'projection_detail_months', 'projection_detail_months', default=None,
+            minimum=0, maximum=MAX_PROJECTION_MONTHS
+        )
+        if projection_months is not None:
+            cells = projection_cells(projection_months, projection_detail_months, len(debts) + len(goals))
+            if cells > MAX_PROJECTION_CELLS:
+                self.errors['projection_months'] = (
+                    'gives {} projection cells, at most {} allowed; '
+                    'lower projection_months or projection_detail_months'.format(cells, MAX_PROJECTION_CELLS)
+                )
+
+        # Share of the optimizer's surplus that tops up savings while below the emergency fund target
+        emergency_fund_share = self.number(
+            data, 'emergency_fund_share', 'emergency_fund_share', default=0.0, minimum=0, maximum=1
+        )
+
+        if self.errors:
+            raise ValidationError(self.errors)
+        return FinancialProfile(
+            monthly_income, current_savings, debts, expenses, income_changes, goals,
+            emergency_fund_target, payoff_solver, payoff_horizon_months, projection_months,
+            projection_detail_months, emergency_fund_share
+        )
+
+    def monte_carlo(self, data):
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            raise ValidationError({'simulation': 'must be an object'})
+
+        paths = self.integer(data, 'paths', 'simulation.paths', default=10000, minimum=100, maximum=MAX_SIMULATION_PATHS)
+        months = self.integer(data, 'months', 'simulation.months', default=12, minimum=1, maximum=MAX_PAYOFF_HORIZON_MONTHS)
+        seed = self.integer(data, 'seed', 'simulation.seed', default=None, minimum=0)
+        income_volatility = self.number(
+            data, 'income_volatility', 'simulation.income_volatility', default=0.1, minimum=0, maximum=MAX_INCOME_VOLATILITY
+        )
+        shock_probability = self.number(
+            data, 'shock_probability', 'simulation.shock_probability', default=0.05, minimum=0, maximum=1
+        )
+        shock_amount = self.amount(data, 'shock_amount', 'simulation.shock_amount', default=500.0)
+        rate_volatility = self.number(
+            data, 'rate_volatility', 'simulation.rate_volatility', default=0.25, minimum=0, maximum=MAX_RATE_VOLATILITY
+        )
+        workers = self.integer(data, 'workers', 'simulation.workers', default=1, minimum=1, maximum=64)
+
+        if self.errors:
+            raise ValidationError(self.errors)
+        return MonteCarloSettings(
+            paths, months, seed, income_volatility, shock_probability, shock_amount, rate_volatility, workers
+        )
+
+    def sweep(self, data, profile):
+        if not isinstance(data, dict):
+            raise ValidationError({'sweep': 'must be an object'})
+
+        strategy = self.choice(data, 'strategy', 'sweep.strategy', SWEEP_STRATEGIES, default='optimal')
+        parameters = data.get('parameters')
+        if not isinstance(parameters, list) or not 1 <= len(parameters) <= 2:
+            self.errors['sweep.parameters'] = 'must be a list of one or two parameters'
+            parameters = []
+        parameters = tuple(
+            self.sweep_parameter(item, 'sweep.parameters[{}]'.format(i), profile)
+            for i, item in enumerate(parameters) if self.is_object(item, 'sweep.parameters[{}]'.format(i))
+        )
+
+        if not self.errors:
+            names = [parameter.name for parameter in parameters]
+            cells = 1
+            for parameter in parameters:
+                cells *= len(parameter.values)
+            if len(set(names)) != len(names):
+                self.errors['sweep.parameters'] = 'must name different parameters'
+            elif cells > MAX_SWEEP_CELLS:
+                self.errors['sweep.parameters'] = 'grid has {} cells, at most {} allowed'.format(cells, MAX_SWEEP_CELLS)
+
+        if self.errors:
+            raise ValidationError(self.errors)
+        return SweepSettings(parameters, strategy)
+
+    def sweep_parameter(self, item, path, profile):
+        name = self.text(item, 'name', path + '.name')
+        match = SWEEP_PARAMETER.match(name or '')
+        if name is not None and match is None:
+            self.errors[path + '.name'] = (
+                'must be extra_funds, debts[i].interest_rate, income_changes[i].amount '
+                'or income_changes[i].start_month'
+            )
+        if match is None:
+            return None
+
+        if match.group(1) is not None:
+            kind, index, count = 'interest_rate', int(match.group(1)), len(profile.debts)
+            minimum, maximum = 0, MAX_INTEREST_RATE
+        elif match.group(2) is not None:
+            kind, index, count = match.group(3), int(match.group(2)), len(profile.income_changes)
+            if kind == 'start_month':
+                minimum, maximum = 1, None
+            elif index < count and profile.income_changes[index].type == 'percentage':
+                minimum, maximum = -100, MAX_PERCENT_CHANGE
+            else:
+                minimum, maximum = -MAX_AMOUNT, MAX_AMOUNT
+        else:
+            kind, index, count, minimum, maximum = 'extra_funds', None, None, -MAX_AMOUNT, MAX_AMOUNT
+        if index is not None and index >= count:
+            self.errors[path + '.name'] = 'refers to a missing item (the request has {})'.format(count)
+
+        values = self.sweep_values(item, path, kind == 'start_month', minimum, maximum)
+        return SweepParameter(name, kind, index, values)
+
+    def sweep_values(self, item, path, whole, minimum, maximum):
+        """Explicit "values", or "start"/"stop" with a "step" or a "count" of evenly spaced points"""
+        convert = self.integer if whole else self.number
+        if item.get('values') is not None:
+            values = item['values']
+            if not isinstance(values, list) or not values:
+                self.errors[path + '.values'] = 'must be a non-empty list'
+                return ()
+            values = tuple(
+                convert({'value': value}, 'value', '{}.values[{}]'.format(path, i), minimum=minimum, maximum=maximum)
+                for i, value in enumerate(values)
+            )
+        else:
+            start = convert(item, 'start', path + '.start', minimum=minimum, maximum=maximum)
+            stop = convert(item, 'stop', path + '.stop', minimum=minimum, maximum=maximum)
+            step = self.number(item, 'step', path + '.step', default=None, minimum=0)
+            count = self.integer(item, 'count', path + '.count', default=None, minimum=2, maximum=MAX_SWEEP_VALUES)
+            if start is None or stop is None:
+                return ()
+            if step:
+                points = int(math.floor(abs(stop - start) / step + 1e-9)) + 1
+                if points > MAX_SWEEP_VALUES:
+                    self.errors[path + '.step'] = 'gives {} values, at most {} allowed'.format(points, MAX_SWEEP_VALUES)
+                    return ()
+                direction = 1 if stop >= start else -1
+                values = tuple(round(start + direction * step * i, 10) for i in range(points))
+            elif count:
+                values = tuple(round(start + (stop - start) * i / (count - 1), 10) for i in range(count))
+            else:
+                self.errors[path] = 'needs values, or start and stop with a step or count'
+                return ()
+            if whole:
+                values = tuple(sorted(set(int(round(value)) for value in values), reverse=stop < start))
+        if len(values) > MAX_SWEEP_VALUES:
+            self.errors[path + '.values'] = 'has {} values, at most {} allowed'.format(len(values), MAX_SWEEP_VALUES)
+        return values
+
+    def allocation(self, data):
+        if not isinstance(data, dict):
+            raise ValidationError({'': 'must be a JSON object'})
+
+        # "monthly_income" is accepted for clients that send a whole profile
+        field = 'monthly_income' if data.get('amount') in (None, '') and 'monthly_income' in data else 'amount'
+        amount = self.amount(data, field, field)
+        keep_in_checking = self.amount(data, 'keep_in_checking', 'keep_in_checking', default=0.0)
+
+        count = sum(len(data[key]) for key in ('targets', 'debts') if isinstance(data.get(key), list))
+        if count > MAX_ALLOCATION_TARGETS:
+            raise ValidationError({
+                'targets': 'has {} targets and debts, at most {} allowed'.format(count, MAX_ALLOCATION_TARGETS)
+            })
+        targets = tuple(
+            self.allocation_target(item, 'targets[{}]'.format(i), i) for i, item in self.items(data, 'targets')
+        )
+        debts = tuple(self.debt(item, 'debts[{}]'.format(i), i) for i, item in self.items(data, 'debts'))
+        if not targets and not debts and not self.errors:
+            self.errors['targets'] = 'needs at least one target or debt'
+
+        if self.errors:
+            raise ValidationError(self.errors)
+        return AllocationRequest(amount, keep_in_checking, targets, debts)
+
+    def allocation_target(self, item, path, index):
+        name = self.text(item, 'name', path + '.name', default='Target {}'.format(index + 1))
+        target_type = self.choice(item, 'type', path + '.type', ALLOCATION_TARGET_TYPES, default='account')
+        minimum = self.amount(item, 'minimum', path + '.minimum', default=0.0)
+        # No cap means the target can absorb any surplus its priority level receives
+        cap = self.amount(item, 'cap', path + '.cap', default=None)
+        if cap is not None and minimum is not None and cap < minimum:
+            self.errors[path + '.cap'] = 'must be at least the minimum'
+        priority = self.priority(item, path + '.priority')
+        weight = self.number(item, 'weight', path + '.weight', default=1.0, minimum=0, maximum=MAX_WEIGHT)
+        enabled = self.flag(item, 'enabled', path + '.enabled', default=True)
+        return AllocationTarget(name, target_type, minimum, cap, priority, weight, enabled)
+
+    def items(self, data, field, limit=None):
+        value = data.get(field)
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            self.errors[field] = 'must be a list'
+            return []
+        # Checked before any item is parsed so an oversized list costs nothing
+        if limit is not None and len(value) > limit:
+            self.errors[field] = 'has {} items, at most {} allowed'.format(len(value), limit)
+            return []
+        return [(i, item) for i, item in enumerate(value) if self.is_object(item, '{}[{}]'.format(field, i))]
+
+    def is_object(self, item, path):
+        if isinstance(item, dict):
+            return True
+        self.errors[path] = 'must be an object'
+        return False
+
+    def debt(self, item, path, index):
+        name = self.text(item, 'name', path + '.name', default='Debt {}'.format(index + 1))
+        current_balance = self.amount(item, 'current_balance', path + '.current_balance')
+        interest_rate = self.number(item, 'interest_rate', path + '.interest_rate', minimum=0, maximum=MAX_INTEREST_RATE)
+        minimum_payment = self.amount(item, 'minimum_payment', path + '.minimum_payment')
+        initial_balance = self.amount(item, 'initial_balance', path + '.initial_balance', default=current_balance)
+        priority = self.priority(item, path + '.priority')
+        variable_rate = self.flag(item, 'variable_rate', path + '.variable_rate', default=False)
+        return Debt(name, current_balance, interest_rate, minimum_payment, initial_balance, priority, variable_rate)
+
+    def expense(self, item, path):
+        category = self.text(item, 'category', path + '.category', default='other')
+        amount = self.amount(item, 'amount', path + '.amount', default=0.0)
+        return Expense(category, amount)
+
+    def income_change(self, item, path):
+        change_type = self.choice(item, 'type', path + '.type', INCOME_CHANGE_TYPES)
+        if change_type == 'percentage':
+            amount = self.number(item, 'amount', path + '.amount', minimum=-100, maximum=MAX_PERCENT_CHANGE)
+        else:
+            amount = self.amount(item, 'amount', path + '.amount', minimum=-MAX_AMOUNT)
+        start_month = self.integer(item, 'start_month', path + '.start_month', minimum=1)
+        return IncomeChange(change_type, amount, start_month)
+
+    def goal(self, item, path, index):
+        name = self.text(item, 'name', path + '.name', default='Goal')
+        goal_type = self.choice(item, 'type', path + '.type', GOAL_TYPES, default='savings')
+        target_amount = self.amount(item, 'target_amount', path + '.target_amount', default=0.0)
+        target_month = self.integer(item, 'target_month', path + '.target_month', default=12, minimum=1)
+        return Goal(name, goal_type, target_amount, target_month)
+
+    def raw(self, item, field, path, default):
+        value = item.get(field)
+        # Blank form inputs arrive as "" and mean "not provided"
+        if value is None or value == '':
+            if default is _MISSING:
+                self.errors[path] = 'is required'
+            return _MISSING
+        return value
+
+    def number(self, item, field, path, default=_MISSING, minimum=None, maximum=None):
+        value = self.raw(item, field, path, default)
+        if value is _MISSING:
+            return None if default is _MISSING else default
+        if isinstance(value, bool):
+            self.errors[path] = 'must be a number'
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            self.errors[path] = 'must be a number'
+            return None
+        if not math.isfinite(number):
+            self.errors[path] = 'must be a finite number'
+            return None
+        if minimum is not None and number < minimum:
+            self.errors[path] = 'must be at least {}'.format(minimum)
+            return None
+        if maximum is not None and number > maximum:
+            self.errors[path] = 'must be at most {}'.format(maximum)
+            return None
+        return number
+
+    def amount(self, item, field, path, default=_MISSING, minimum=0):
+        """A money amount, at most MAX_AMOUNT"""
+        return self.number(item, field, path, default, minimum=minimum, maximum=MAX_AMOUNT)
+
+    def integer(self, item, field, path, default=_MISSING, minimum=None, maximum=None):
+        number = self.number(item, field, path, default)
+        if number is None:
+            return None
+        if number != int(number):
+            self.errors[path] = 'must be a whole number'
+            return None
+        number = int(number)
+        if minimum is not None and number < minimum or maximum is not None and number > maximum:
+            self.errors[path] = 'must be between {} and {}'.format(minimum, maximum) if maximum is not None \
+                else 'must be at least {}'.format(minimum)
+            return None
+        return number
+
+    def flag(self, item, field, path, default=_MISSING):
+        value = self.raw(item, field, path, default)
+        if value is _MISSING:
+            return None if default is _MISSING else default
+        if not isinstance(value, bool):
+            self.errors[path] = 'must be true or false'
+            return None
+        return value
+
+    def text(self, item, field, path, default=_MISSING):
+        value = self.raw(item, field, path, default)
+        if value is _MISSING:
+            return None if default is _MISSING else default
+        if not isinstance(value, str):
+            self.errors[path] = 'must be a string'
+            return None
+        return value
+
+    def choice(self, item, field, path, choices, default=_MISSING):
+        value = self.raw(item, field, path, default)
+        if value is _MISSING:
+            return None if default is _MISSING else default
+        if value not in choices:
+            self.errors[path] = 'must be one of: {}'.format(', '.join(choices))
+            return None
+        return value
+
+    def priority(self, item, path):
+        value = item.get('priority')
+        if value is None or value == '':
+            return DEFAULT_PRIORITY
+        if isinstance(value, str) and value.lower() in PRIORITY_LEVELS:
+            return PRIORITY_LEVELS[value.lower()]
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value in range(1, 6):
+            return int(value)
+        self.errors[path] = 'must be 1-5 or one of: {}'.format(', '.join(PRIORITY_LEVELS))
+        return None
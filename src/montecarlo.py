@@ -0,0 +1,191 @@
+import numpy as np
+
+from engine import fill_in_order
+from models import month_income
+
+PERCENTILES = (10, 50, 90)
+HISTOGRAM_BINS = 2048
+CHUNK_PATHS = 2000
+# Histogram range is the pilot chunk's range widened by this fraction on each side
+HISTOGRAM_MARGIN = 0.25
+
+
+def build_model(profile, settings):
+    """Flatten a profile and simulation settings into plain arrays a chunk worker can use"""
+    # Prepay highest rate first, like the deterministic projection
+    debts = sorted(profile.debts, key=lambda debt: debt.interest_rate, reverse=True)
+    return {
+        'months': settings.months,
+        'base_income': np.array([
+            month_income(profile.monthly_income, profile.income_changes, month)
+            for month in range(1, settings.months + 1)
+        ]),
+        'expenses': sum(expense.amount for expense in profile.expenses),
+        'savings': profile.current_savings,
+        'balances': np.array([debt.current_balance for debt in debts]),
+        'rates': np.array([debt.interest_rate for debt in debts]),
+        'minimums': np.array([debt.minimum_payment for debt in debts]),
+        'variable': np.array([bool(debt.variable_rate) for debt in debts]),
+        'initial_debt': sum(debt.initial_balance for debt in debts),
+        'goal_types': [goal.type for goal in profile.goals],
+        'goal_targets': np.array([goal.target_amount for goal in profile.goals]),
+        'goal_months': np.array([goal.target_month for goal in profile.goals]),
+        'income_volatility': settings.income_volatility,
+        'shock_probability': settings.shock_probability,
+        'shock_amount': settings.shock_amount,
+        'rate_volatility': settings.rate_volatility
+    }
+
+
+def simulate_chunk(model, paths, seed, edges=None):
+    """Simulate one chunk of paths and fold it into per-month histograms
+
+    Without edges (the pilot chunk) the histogram ranges are derived from
+    this chunk's own values and returned for the remaining chunks to use.
+    """
+    rng = np.random.default_rng(seed)
+    months = model['months']
+    sigma = model['income_volatility']
+
+    balances = np.tile(model['balances'], (paths, 1))
+    rates = np.tile(model['rates'], (paths, 1))
+    variable = model['variable']
+    cash = np.full(paths, float(model['savings']))
+
+    cash_values = np.empty((months, paths))
+    debt_values = np.empty((months, paths))
+    goal_hits = np.zeros((len(model['goal_types']), months), dtype=np.int64)
+
+    for month in range(months):
+        # Mean-preserving lognormal income noise and random one-off expenses
+        income = model['base_income'][month] * np.exp(sigma * rng.standard_normal(paths) - sigma ** 2 / 2)
+        shocks = (rng.random(paths) < model['shock_probability']) * rng.exponential(model['shock_amount'], paths)
+        available = income - model['expenses'] - shocks
+
+        if variable.any():
+            drift = model['rate_volatility'] * rng.standard_normal((paths, int(variable.sum())))
+            rates[:, variable] = np.maximum(rates[:, variable] + drift, 0.0)
+
+        owed = balances * (1 + rates / 100 / 12)
+        # Minimums are always paid (from savings if need be); any surplus prepays in rate order
+        minimum_due = np.minimum(model['minimums'], owed)
+        surplus = np.maximum(available - minimum_due.sum(axis=1), 0.0)
+        payment = minimum_due + fill_in_order(surplus, owed - minimum_due)
+
+        balances = owed - payment
+        balances[balances < 1e-9] = 0.0
+        cash += available - payment.sum(axis=1)
+        debt = balances.sum(axis=1)
+
+        cash_values[month] = cash
+        debt_values[month] = debt
+        for index, (goal_type, target, target_month) in enumerate(
+                zip(model['goal_types'], model['goal_targets'], model['goal_months'])):
+            progress = (month + 1) / target_month
+            if goal_type == 'savings':
+                goal_hits[index, month] = np.count_nonzero(cash >= target * progress)
+            elif goal_type == 'debt_payoff':
+                goal_hits[index, month] = np.count_nonzero(debt <= model['initial_debt'] * (1 - progress))
+            # Purchase goals are never on track, matching check_goal_progress
+
+    pilot = edges is None
+    if pilot:
+        edges = {'current_balance': _histogram_edges(cash_values), 'total_debt_remaining': _histogram_edges(debt_values)}
+
+    chunk = {
+        'goal_hits': goal_hits,
+        'histograms': {
+            'current_balance': _histogram(cash_values, *edges['current_balance']),
+            'total_debt_remaining': _histogram(debt_values, *edges['total_debt_remaining'])
+        }
+    }
+    if pilot:
+        chunk['edges'] = edges
+    return chunk
+
+
+def _histogram_edges(values):
+    low = values.min(axis=1)
+    high = values.max(axis=1)
+    span = np.maximum(high - low, 1.0)
+    low = low - span * HISTOGRAM_MARGIN
+    width = span * (1 + 2 * HISTOGRAM_MARGIN) / HISTOGRAM_BINS
+    return low, width
+
+
+def _histogram(values, low, width):
+    """Per-month bin counts; values outside the range land in the edge bins"""
+    bins = np.clip(((values - low[:, None]) / width[:, None]).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+    offsets = np.arange(values.shape[0])[:, None] * HISTOGRAM_BINS
+    return np.bincount((bins + offsets).ravel(), minlength=values.shape[0] * HISTOGRAM_BINS).reshape(
+        values.shape[0], HISTOGRAM_BINS
+    )
+
+
+def _percentile_bands(counts, low, width, total):
+    cumulative = np.cumsum(counts, axis=1)
+    bands = {}
+    for percentile in PERCENTILES:
+        target = total * percentile / 100
+        bins = np.array([np.searchsorted(row, target) for row in cumulative])
+        bins = np.minimum(bins, HISTOGRAM_BINS - 1)
+        before = np.where(bins > 0, cumulative[np.arange(len(bins)), bins - 1], 0)
+        inside = np.maximum(counts[np.arange(len(bins)), bins], 1)
+        # Interpolate linearly inside the bin
+        fraction = np.clip((target - before) / inside, 0, 1)
+        # Adding 0.0 folds -0.0 into 0.0
+        bands['p{}'.format(percentile)] = (np.round(low + (bins + fraction) * width, 2) + 0.0).tolist()
+    return bands
+
+
+def run_monte_carlo(profile, settings, executor=None):
+    """Run settings.paths simulated paths in chunks and return P10/P50/P90 bands
+
+    Only per-month histograms are kept between chunks, so memory is bounded
+    by months x HISTOGRAM_BINS however many paths run. Chunks after the
+    pilot are spread over executor when settings.workers > 1.
+    """
+    model = build_model(profile, settings)
+    chunk_sizes = [CHUNK_PATHS] * (settings.paths // CHUNK_PATHS)
+    if settings.paths % CHUNK_PATHS:
+        chunk_sizes.append(settings.paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(settings.seed).spawn(len(chunk_sizes))
+
+    # The pilot chunk fixes the histogram ranges every other chunk bins into
+    pilot = simulate_chunk(model, chunk_sizes[0], seeds[0])
+    edges = pilot['edges']
+    rest = list(zip(chunk_sizes[1:], seeds[1:]))
+    if executor is not None and settings.workers > 1 and rest:
+        chunks = executor.map(
+            simulate_chunk, [model] * len(rest), [size for size, _ in rest], [seed for _, seed in rest],
+            [edges] * len(rest)
+        )
+    else:
+        chunks = (simulate_chunk(model, size, seed, edges) for size, seed in rest)
+
+    histograms = pilot['histograms']
+    goal_hits = pilot['goal_hits']
+    for chunk in chunks:
+        for name in histograms:
+            histograms[name] = histograms[name] + chunk['histograms'][name]
+        goal_hits = goal_hits + chunk['goal_hits']
+
+    total = settings.paths
+    return {
+        'paths': total,
+        'months': settings.months,
+        'bands': {
+            name: _percentile_bands(counts, *edges[name], total) for name, counts in histograms.items()
+        },
+        'goals': [
+            {
+                'name': goal.name,
+                'type': goal.type,
+                'target_month': goal.target_month,
+                # Goals due after the horizon are judged on the last simulated month
+                'on_track_probability': round(float(hits[min(goal.target_month, settings.months) - 1]) / total, 4),
+                'monthly_on_track_probability': np.round(hits / total, 4).tolist()
+            }
+            for goal, hits in zip(profile.goals, goal_hits)
+        ]
+    }
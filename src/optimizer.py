@@ -0,0 +1,98 @@
+import os
+import time
+
+import numpy as np
+
+from engine import fill_in_order, month_column
+from factors import CLEARED_BALANCE
+
+OPTIMAL_TIME_BUDGET_MS = float(os.environ.get('OPTIMAL_TIME_BUDGET_MS', 250))
+
+
+def optimize_payoff_batch(balances, rates, minimums, priorities, budget, savings=0.0, emergency_target=0.0,
+                          max_months=120, emergency_share=0.0, time_budget_ms=OPTIMAL_TIME_BUDGET_MS):
+    """Allocate a fixed monthly debt budget to minimize total interest
+
+    Each month the budget (minimums plus available funds) first covers
+    minimum payments, then emergency_share of the surplus tops up savings
+    until the emergency target is met, and the rest prepays debts. With a
+    fixed budget and minimums the interest-minimizing allocation of that
+    surplus is greedy: highest rate first (it also minimizes the balance
+    left every month, hence time to payoff). Priorities (1 = critical)
+    are honoured as tiers, so the solution is rate-optimal within each
+    tier. Minimums themselves are funded in the same order when the
+    budget cannot cover them all.
+
+    Arrays are (scenarios x debts); budget, savings and emergency_target
+    are per scenario, and budget may also be a (scenarios x months)
+    schedule whose last month repeats. emergency_share defaults to 0, so
+    the whole budget goes to debts unless the caller asks otherwise.
+    Returns (months, total_interest, first_payments, saved, truncated),
+    where first_payments is the first month's allocation per debt in
+    input order, saved is the total diverted to savings per scenario and
+    truncated is True if time_budget_ms ran out before every scenario
+    finished.
+    """
+    balances = np.array(balances, dtype=float, ndmin=2)
+    shape = balances.shape
+    monthly_rates = np.asarray(rates, dtype=float).reshape(shape) / 100 / 12
+    minimums = np.asarray(minimums, dtype=float).reshape(shape)
+    priorities = np.asarray(priorities, dtype=float).reshape(shape)
+    rows = shape[0]
+    budget = np.asarray(budget, dtype=float)
+    if budget.ndim < 2:
+        budget = np.broadcast_to(budget, (rows,))
+    savings = np.array(np.broadcast_to(np.asarray(savings, dtype=float), (rows,)))
+    initial_savings = savings.copy()
+    emergency_target = np.broadcast_to(np.asarray(emergency_target, dtype=float), (rows,))
+
+    # Work in payment order: priority tier, then highest rate first
+    order = np.lexsort((-monthly_rates, priorities), axis=-1)
+    balances = np.take_along_axis(balances, order, axis=1)
+    monthly_rates = np.take_along_axis(monthly_rates, order, axis=1)
+    minimums = np.take_along_axis(minimums, order, axis=1)
+
+    months = np.zeros(rows, dtype=int)
+    total_interest = np.zeros(rows)
+    first_payments = np.zeros(shape)
+    deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms else None
+    truncated = False
+
+    active = balances > 0
+    running = active.any(axis=1)
+    month = 0
+    while month < max_months and running.any():
+        if deadline is not None and time.perf_counter() > deadline:
+            truncated = True
+            break
+        month += 1
+        months += running
+
+        interest = np.where(active, balances * monthly_rates, 0.0)
+        total_interest += interest.sum(axis=1)
+        owed = balances + interest
+
+        month_budget = month_column(budget, month)
+        minimum_due = np.where(active, np.minimum(minimums, owed), 0.0)
+        minimum_paid = fill_in_order(np.maximum(month_budget, 0.0), minimum_due)
+        surplus = np.maximum(month_budget - minimum_paid.sum(axis=1), 0.0)
+
+        to_savings = np.minimum(surplus * emergency_share, np.maximum(emergency_target - savings, 0.0))
+        savings += to_savings
+        surplus -= to_savings
+
+        extra_paid = fill_in_order(surplus, owed - minimum_paid)
+        payment = minimum_paid + extra_paid
+        if month == 1:
+            first_payments = payment
+
+        balances = np.where(active, owed - payment, balances)
+        # Treat float residue as paid off
+        balances[balances <= CLEARED_BALANCE] = 0.0
+        active = balances > 0
+        running = active.any(axis=1)
+
+    # Scatter the first month's payments back to input order
+    unsorted = np.empty_like(first_payments)
+    np.put_along_axis(unsorted, order, first_payments, axis=1)
+    return months, total_interest, unsorted, savings - initial_savings, truncated
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from plan_store import create_plan_store
+
+
+def cache_key(profile):
+    """Content hash of a parsed FinancialProfile
+
+    Parsing already normalizes numbers and drops client-side ids and fields
+    the planner never reads, so equivalent payloads share a key.
+    """
+    return hashlib.sha256(repr(profile.key()).encode('utf-8')).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU with TTL, private to one worker
+
+    Each entry has a cost (1 unless the caller says otherwise) and the
+    least recently used entries are evicted until both max_entries and
+    max_cost hold; a value costing more than max_cost is not stored.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries=512, ttl=3600, max_cost=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_cost = max_cost
+        self.cost = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value, cost = entry
+            if self.ttl and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self.cost -= cost
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, cost=1):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.cost -= old[2]
+            if self.max_cost is not None and cost > self.max_cost:
+                return
+            self._entries[key] = (time.time(), value, cost)
+            self.cost += cost
+            while len(self._entries) > self.max_entries or (self.max_cost is not None and self.cost > self.max_cost):
+                self.cost -= self._entries.popitem(last=False)[1][2]
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """LRU with TTL stored in the plan_results table, shared by every worker using the same database file"""
+
+    name = 'sqlite'
+
+    def __init__(self, store, max_entries=512, ttl=3600, max_cost=None):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Only caps single entries here; the table lives on disk
+        self.max_cost = max_cost
+
+    def get(self, key):
+        with self.store.reader.connection() as connection:
+            row = connection.execute(
+                "SELECT timeline_data, CAST(strftime('%s', created_at) AS REAL) FROM plan_results WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self.store.writer.connection() as connection, connection:
+            if self.ttl and now - row[1] > self.ttl:
+                connection.execute('DELETE FROM plan_results WHERE cache_key = ?', (key,))
+                return None
+            connection.execute('UPDATE plan_results SET last_used = ? WHERE cache_key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, cost=1):
+        if self.max_cost is not None and cost > self.max_cost:
+            return
+        strategies = value.get('debt_strategies', {})
+        months_to_payoff = strategies.get('avalanche', {}).get('months_to_payoff')
+        with self.store.writer.connection() as connection, connection:
+            # Cached results are not tied to a saved plan, so they use plan_id 0
+            connection.execute(
+                'INSERT OR REPLACE INTO plan_results '
+                '(plan_id, months_to_payoff, timeline_data, strategy_comparison, cache_key, last_used, created_at) '
+                'VALUES (0, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)',
+                (months_to_payoff, json.dumps(value), json.dumps(strategies), key, time.time())
+            )
+            connection.execute(
+                'DELETE FROM plan_results WHERE cache_key IS NOT NULL AND id NOT IN ('
+                'SELECT id FROM plan_results WHERE cache_key IS NOT NULL ORDER BY last_used DESC LIMIT ?)',
+                (self.max_entries,)
+            )
+
+    def size(self):
+        with self.store.reader.connection() as connection:
+            return connection.execute('SELECT COUNT(*) FROM plan_results WHERE cache_key IS NOT NULL').fetchone()[0]
+
+
+class SectionMemo:
+    """Per-section memo so a plan only recomputes the sections whose inputs changed
+
+    Every section keeps at most max_entries values costing max_cost in total.
+    """
+
+    def __init__(self, max_entries=256, max_cost=None):
+        self.max_entries = max_entries
+        self.max_cost = max_cost
+        self._sections = {}
+        self._lock = threading.Lock()
+
+    def compute(self, name, inputs, compute, trace, cost=1):
+        """Return (key, value) for a section, recording in trace whether it was served from memo
+
+        inputs must be hashable (numbers, strings and tuples of records) and
+        doubles as the memo key.
+        """
+        with self._lock:
+            backend = self._sections.get(name)
+            if backend is None:
+                backend = self._sections[name] = MemoryBackend(self.max_entries, ttl=0, max_cost=self.max_cost)
+
+        key = inputs
+        value = backend.get(key)
+        if value is None:
+            value = compute()
+            backend.set(key, value, cost)
+            trace['computed'].append(name)
+        else:
+            trace['memo'].append(name)
+        return key, value
+
+
+class PlanCache:
+    """Result cache for calculate_comprehensive_plan keyed on the parsed profile"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, profile, compute):
+        """Return (result, hit) for a FinancialProfile, computing and storing it on a miss
+
+        Results are charged their projection_cells(), so oversized plans are
+        computed but not kept.
+        """
+        key = cache_key(profile)
+        result = self.backend.get(key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+            return result, True
+
+        with self._lock:
+            self.misses += 1
+        result = compute(profile)
+        self.backend.set(key, result, profile.projection_cells())
+        return result, False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0,
+            'size': self.backend.size(),
+            'max_entries': self.backend.max_entries,
+            'max_cells': self.backend.max_cost,
+            'ttl': self.backend.ttl
+        }
+
+
+def create_plan_cache(get_store=create_plan_store):
+    """Build the plan cache configured through PLAN_CACHE_* environment variables
+
+    The sqlite backend shares the plan store's connection pools; get_store
+    returns that store.
+    """
+    backend_name = os.environ.get('PLAN_CACHE_BACKEND', 'memory')
+    max_entries = int(os.environ.get('PLAN_CACHE_SIZE', 512))
+    ttl = int(os.environ.get('PLAN_CACHE_TTL', 3600))
+    # Projection cells (FinancialProfile.projection_cells) across cached plans, roughly 600 bytes each in memory
+    max_cells = int(os.environ.get('PLAN_CACHE_MAX_CELLS', 200000))
+
+    if backend_name == 'off':
+        return None
+    if backend_name == 'sqlite':
+        return PlanCache(SQLiteBackend(get_store(), max_entries, ttl, max_cells))
+    if backend_name == 'memory':
+        return PlanCache(MemoryBackend(max_entries, ttl, max_cells))
+    raise ValueError('Unknown PLAN_CACHE_BACKEND: {}'.format(backend_name))
@@ -0,0 +1,298 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from models import PRIORITY_LEVELS
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debt_planner.db')
+PLAN_STORE_POOL_SIZE = int(os.environ.get('PLAN_STORE_POOL_SIZE', 4))
+# WAL needs shared memory between every process that opens the file, so it is only safe when they all
+# run on one host; set DELETE for a database on a network or shared filesystem (NFS, RWX volumes)
+PLAN_DB_JOURNAL_MODE = os.environ.get('PLAN_DB_JOURNAL_MODE', 'WAL').upper()
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST')
+# Connections keep their compiled statements, so every query below is prepared once per connection
+STATEMENT_CACHE_SIZE = 128
+PRIORITY_NAMES = {level: name for name, level in PRIORITY_LEVELS.items()}
+
+# Flat per-month projection columns; nested details (payments, goal progress) go in detail as JSON
+PROJECTION_COLUMNS = (
+    'month', 'income', 'expenses', 'savings', 'current_balance', 'emergency_fund_ratio', 'total_debt_remaining'
+)
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections handed out one request at a time
+
+    Writers share one connection (SQLite allows a single writer anyway)
+    while readers get a read-only pool; with WAL they never wait on a write.
+    """
+
+    def __init__(self, db_path, size, readonly=False, journal_mode=PLAN_DB_JOURNAL_MODE):
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError('Unknown PLAN_DB_JOURNAL_MODE: {}'.format(journal_mode))
+        self.db_path = db_path
+        self.size = size
+        self.readonly = readonly
+        self.journal_mode = journal_mode
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.readonly:
+            connection = sqlite3.connect(
+                'file:{}?mode=ro'.format(self.db_path), uri=True, timeout=5,
+                check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+            )
+        else:
+            connection = sqlite3.connect(
+                self.db_path, timeout=5, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+            )
+            connection.execute('PRAGMA journal_mode={}'.format(self.journal_mode))
+            # NORMAL is only durable with WAL; rollback journals need FULL
+            connection.execute('PRAGMA synchronous={}'.format('NORMAL' if self.journal_mode == 'WAL' else 'FULL'))
+        # Foreign keys stay off: cached results in plan_results use plan_id 0, which has no plan
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, opening a new one while the pool is below size"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            connection = self._connect() if create else self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class PlanStore:
+    """Saved financial profiles and their plan history in debt_planner.db"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, read_pool_size=PLAN_STORE_POOL_SIZE):
+        self.db_path = db_path
+        self.writer = ConnectionPool(db_path, 1)
+        self._migrate()
+        self.reader = ConnectionPool(db_path, read_pool_size, readonly=True)
+
+    def _migrate(self):
+        with self.writer.connection() as connection, connection:
+            # The original schema, for a new database file (e.g. a fresh volume); older files already have it
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS debt_plans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    monthly_income REAL NOT NULL,
+                    keep_in_checking REAL DEFAULT 0,
+                    strategy TEXT DEFAULT 'avalanche',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS debts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    plan_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    current_balance REAL NOT NULL,
+                    interest_rate REAL NOT NULL,
+                    minimum_payment REAL NOT NULL,
+                    priority TEXT DEFAULT 'medium',
+                    FOREIGN KEY (plan_id) REFERENCES debt_plans (id) ON DELETE CASCADE
+                )
+            ''')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS plan_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    plan_id INTEGER NOT NULL,
+                    total_interest_saved REAL,
+                    months_to_payoff INTEGER,
+                    total_allocated REAL,
+                    timeline_data TEXT,  -- JSON string
+                    strategy_comparison TEXT,  -- JSON string
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (plan_id) REFERENCES debt_plans (id) ON DELETE CASCADE
+                )
+            ''')
+
+            plan_columns = {row[1] for row in connection.execute('PRAGMA table_info(debt_plans)')}
+            if 'profile' not in plan_columns:
+                # The normalized request body, so a saved plan can be loaded back into the form
+                connection.execute('ALTER TABLE debt_plans ADD COLUMN profile TEXT')
+
+            result_columns = {row[1] for row in connection.execute('PRAGMA table_info(plan_results)')}
+            # plan_results predates the cache; cached rows are the ones with a cache_key
+            if 'cache_key' not in result_columns:
+                connection.execute('ALTER TABLE plan_results ADD COLUMN cache_key TEXT')
+            if 'last_used' not in result_columns:
+                connection.execute('ALTER TABLE plan_results ADD COLUMN last_used REAL')
+            if 'result_data' not in result_columns:
+                connection.execute('ALTER TABLE plan_results ADD COLUMN result_data TEXT')
+            connection.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_plan_results_cache_key ON plan_results (cache_key)'
+            )
+
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS projection_rows (
+                    result_id INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    income REAL,
+                    expenses REAL,
+                    savings REAL,
+                    current_balance REAL,
+                    emergency_fund_ratio REAL,
+                    total_debt_remaining REAL,
+                    detail TEXT,  -- JSON string
+                    PRIMARY KEY (result_id, month),
+                    FOREIGN KEY (result_id) REFERENCES plan_results (id) ON DELETE CASCADE
+                )
+            ''')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_plan_results_plan_id ON plan_results (plan_id)')
+
+    def save_plan(self, profile, result, name=None, plan_id=None):
+        """Insert or update a plan with its debts and append result to its history
+
+        Returns (plan_id, result_id), or None if plan_id does not exist.
+        """
+        summary = result['summary']
+        strategies = result['debt_strategies']
+        profile_json = json.dumps(profile.to_dict())
+
+        with self.writer.connection() as connection, connection:
+            if plan_id is None:
+                plan_id = connection.execute(
+                    'INSERT INTO debt_plans (name, monthly_income, strategy, profile) VALUES (?, ?, ?, ?)',
+                    (name or 'Plan', profile.monthly_income, 'optimal', profile_json)
+                ).lastrowid
+            else:
+                updated = connection.execute(
+                    'UPDATE debt_plans SET name = COALESCE(?, name), monthly_income = ?, profile = ?, '
+                    'updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                    (name, profile.monthly_income, profile_json, plan_id)
+                ).rowcount
+                if not updated:
+                    return None
+                connection.execute('DELETE FROM debts WHERE plan_id = ?', (plan_id,))
+
+            connection.executemany(
+                'INSERT INTO debts (plan_id, name, current_balance, interest_rate, minimum_payment, priority) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        plan_id, debt.name, debt.current_balance, debt.interest_rate, debt.minimum_payment,
+                        PRIORITY_NAMES[debt.priority]
+                    )
+                    for debt in profile.debts
+                ]
+            )
+
+            # What the optimal plan saves over the avalanche on the same budget (priorities can make it negative)
+            avalanche = strategies.get('avalanche', {})
+            optimal = strategies.get('optimal', avalanche)
+            result_id = connection.execute(
+                'INSERT INTO plan_results (plan_id, total_interest_saved, months_to_payoff, total_allocated, '
+                'strategy_comparison, result_data) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    plan_id,
+                    round(avalanche.get('total_interest', 0) - optimal.get('total_interest', 0), 2),
+                    optimal.get('months_to_payoff'),
+                    summary['total_min_payments'] + max(summary['available_funds'], 0),
+                    json.dumps(strategies),
+                    json.dumps({
+                        key: value for key, value in result.items()
+                        if key not in ('projection', 'debt_strategies', 'memo')
+                    })
+                )
+            ).lastrowid
+
+            connection.executemany(
+                'INSERT INTO projection_rows (result_id, {}, detail) VALUES (?, {}, ?)'.format(
+                    ', '.join(PROJECTION_COLUMNS), ', '.join('?' * len(PROJECTION_COLUMNS))
+                ),
+                [
+                    (result_id,) + tuple(row[column] for column in PROJECTION_COLUMNS) + (json.dumps({
+                        key: value for key, value in row.items() if key not in PROJECTION_COLUMNS
+                    }),)
+                    for row in result['projection']
+                ]
+            )
+        return plan_id, result_id
+
+    def load_plan(self, plan_id):
+        """Return a saved plan with its profile, latest result and result history, or None"""
+        with self.reader.connection() as connection:
+            plan = connection.execute(
+                'SELECT id, name, strategy, profile, created_at, updated_at FROM debt_plans WHERE id = ?', (plan_id,)
+            ).fetchone()
+            if plan is None:
+                return None
+            history = connection.execute(
+                'SELECT id, months_to_payoff, total_interest_saved, created_at FROM plan_results '
+                'WHERE plan_id = ? AND cache_key IS NULL ORDER BY id DESC', (plan_id,)
+            ).fetchall()
+            result = self._load_result(connection, history[0]['id']) if history else None
+
+        return {
+            'id': plan['id'],
+            'name': plan['name'],
+            'strategy': plan['strategy'],
+            'profile': json.loads(plan['profile']) if plan['profile'] else None,
+            'created_at': plan['created_at'],
+            'updated_at': plan['updated_at'],
+            'result': result,
+            'history': [dict(row) for row in history]
+        }
+
+    def _load_result(self, connection, result_id):
+        row = connection.execute(
+            'SELECT strategy_comparison, result_data FROM plan_results WHERE id = ?', (result_id,)
+        ).fetchone()
+        result = json.loads(row['result_data'] or '{}')
+        result['debt_strategies'] = json.loads(row['strategy_comparison'] or '{}')
+        result['projection'] = [
+            {**{column: projection[column] for column in PROJECTION_COLUMNS}, **json.loads(projection['detail'])}
+            for projection in connection.execute(
+                'SELECT {}, detail FROM projection_rows WHERE result_id = ? ORDER BY month'.format(
+                    ', '.join(PROJECTION_COLUMNS)
+                ),
+                (result_id,)
+            )
+        ]
+        return result
+
+    def list_plans(self, limit=50, offset=0):
+        """Saved plans, most recently updated first"""
+        with self.reader.connection() as connection:
+            rows = connection.execute(
+                'SELECT p.id, p.name, p.monthly_income, p.strategy, p.created_at, p.updated_at, '
+                'COUNT(r.id) AS results FROM debt_plans p '
+                'LEFT JOIN plan_results r ON r.plan_id = p.id AND r.cache_key IS NULL '
+                'GROUP BY p.id ORDER BY p.updated_at DESC, p.id DESC LIMIT ? OFFSET ?',
+                (limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+def create_plan_store():
+    """Open the plan store at PLAN_DB_PATH"""
+    return PlanStore(os.environ.get('PLAN_DB_PATH', DEFAULT_DB_PATH))
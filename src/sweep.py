@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+from engine import simulate_payoff_batch
+from optimizer import optimize_payoff_batch
+
+# A whole grid gets more time than the single optimal run inside a plan
+SWEEP_TIME_BUDGET_MS = float(os.environ.get('SWEEP_TIME_BUDGET_MS', 2000))
+
+
+def grid_values(settings):
+    """Per-cell value of every swept parameter, flattened row-major over the grid"""
+    axes = np.meshgrid(*[np.asarray(parameter.values, dtype=float) for parameter in settings.parameters],
+                       indexing='ij')
+    return [axis.ravel() for axis in axes]
+
+
+def income_schedule(monthly_income, income_changes, amounts, starts, months):
+    """Vectorized month_income over (cells x changes) amounts and start months for months 1..months"""
+    month = np.arange(1, months + 1)[None, :]
+    income = np.full((amounts.shape[0], months), float(monthly_income))
+    # Changes apply in request order, exactly like month_income
+    for column, change in enumerate(income_changes):
+        amount = amounts[:, column, None]
+        start = starts[:, column, None]
+        if change.type == 'percentage':
+            income = np.where(start <= month, income * (1 + amount / 100), income)
+        elif change.type == 'fixed':
+            income = np.where(start <= month, income + amount, income)
+        elif change.type == 'one_time':
+            income = np.where(start == month, income + amount, income)
+    return income
+
+
+def run_sweep(profile, settings):
+    """Evaluate the payoff strategy over a one- or two-parameter grid in one batched pass
+
+    Every grid cell becomes one scenario row. Income changes are applied
+    month by month to the funds available for debts, so moving a raise
+    earlier or later changes the result.
+    """
+    debts = profile.debts
+    values = grid_values(settings)
+    cells = values[0].shape[0]
+    months = profile.payoff_horizon_months
+
+    rates = np.tile([float(debt.interest_rate) for debt in debts], (cells, 1))
+    amounts = np.tile([float(change.amount) for change in profile.income_changes], (cells, 1))
+    starts = np.tile([float(change.start_month) for change in profile.income_changes], (cells, 1))
+    extra_funds = np.zeros(cells)
+    for parameter, cell_values in zip(settings.parameters, values):
+        if parameter.kind == 'extra_funds':
+            extra_funds = cell_values
+        elif parameter.kind == 'interest_rate':
+            rates[:, parameter.index] = cell_values
+        elif parameter.kind == 'amount':
+            amounts[:, parameter.index] = cell_values
+        else:
+            starts[:, parameter.index] = cell_values
+
+    balances = np.tile([float(debt.current_balance) for debt in debts], (cells, 1))
+    minimums = np.tile([float(debt.minimum_payment) for debt in debts], (cells, 1))
+    expenses = sum(expense.amount for expense in profile.expenses)
+    # Funds for debts each month on top of the minimums, as (cells x months)
+    available = (income_schedule(profile.monthly_income, profile.income_changes, amounts, starts, months)
+                 - expenses - minimums.sum(axis=1)[:, None] + extra_funds[:, None])
+
+    truncated = False
+    if not debts:
+        payoff_months, total_interest = np.zeros(cells, dtype=int), np.zeros(cells)
+    elif settings.strategy == 'optimal':
+        priorities = np.tile([debt.priority for debt in debts], (cells, 1))
+        # The heuristics always pay every minimum, so the optimizer gets at least that much too
+        payoff_months, total_interest, _, _, truncated = optimize_payoff_batch(
+            balances, rates, minimums, priorities, np.maximum(available, 0.0) + minimums.sum(axis=1)[:, None],
+            profile.current_savings, profile.emergency_fund_target, months, profile.emergency_fund_share,
+            time_budget_ms=SWEEP_TIME_BUDGET_MS
+        )
+    else:
+        payoff_months, total_interest = simulate_payoff_batch(balances, rates, minimums, available, months)
+
+    shape = tuple(len(parameter.values) for parameter in settings.parameters)
+    return {
+        'strategy': settings.strategy,
+        'max_months': months,
+        'parameters': [{'name': parameter.name, 'values': list(parameter.values)} for parameter in settings.parameters],
+        # Rows follow the first parameter's values, columns the second's
+        'months_to_payoff': payoff_months.reshape(shape).tolist(),
+        'total_interest': np.round(total_interest, 2).reshape(shape).tolist(),
+        'truncated': truncated
+    }
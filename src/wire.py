@@ -0,0 +1,106 @@
+import json
+
+from models import ValidationError
+
+PLAN_SECTIONS = ('summary', 'projection', 'debt_strategies', 'recommendations', 'expense_breakdown', 'memo')
+LAYOUTS = ('rows', 'columnar')
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+# Per-item lists inside each projected month
+NESTED_PROJECTION_FIELDS = ('debt_payments', 'goal_progress')
+
+
+def parse_format(args):
+    """Read fields, layout and precision query parameters, raising ValidationError for bad ones"""
+    errors = {}
+    fields = None
+    if args.get('fields'):
+        fields = tuple(field.strip() for field in args['fields'].split(',') if field.strip())
+        unknown = [field for field in fields if field not in PLAN_SECTIONS]
+        if unknown:
+            errors['fields'] = 'unknown section(s) {}; choose from: {}'.format(', '.join(unknown), ', '.join(PLAN_SECTIONS))
+
+    layout = args.get('layout', 'rows')
+    if layout not in LAYOUTS:
+        errors['layout'] = 'must be one of: {}'.format(', '.join(LAYOUTS))
+
+    precision = args.get('precision')
+    if precision is not None:
+        try:
+            precision = int(precision)
+        except ValueError:
+            precision = -1
+        if not 0 <= precision <= 10:
+            errors['precision'] = 'must be a whole number between 0 and 10'
+
+    if errors:
+        raise ValidationError(errors)
+    return fields, layout, precision
+
+
+def shape_plan(result, fields=None, layout='rows', precision=None):
+    """Select sections, switch the projection to columns and round floats as requested"""
+    if fields is not None:
+        result = {name: result[name] for name in fields if name in result}
+    if layout == 'columnar' and 'projection' in result:
+        result = {**result, 'projection': columnar_projection(result['projection'])}
+    if precision is not None:
+        result = round_floats(result, precision)
+    return result
+
+
+def columnar_projection(rows):
+    """One list per field instead of one object per month
+
+    Nested per-debt and per-goal lists become {"month": [...], "name":
+    [per item], field: [month][item]}. Items keep the same order every
+    month, so names are sent once; a field missing from some items (or
+    months) is null there. Months without the nested list (past
+    projection_detail_months) are left out of its "month" list.
+    """
+    columns = {}
+    for row in rows:
+        for key in row:
+            if key not in columns and key not in NESTED_PROJECTION_FIELDS:
+                columns[key] = [other.get(key) for other in rows]
+
+    for key in NESTED_PROJECTION_FIELDS:
+        detailed = [row for row in rows if key in row]
+        if not detailed:
+            continue
+        nested = {'month': [row['month'] for row in detailed], 'name': [item['name'] for item in detailed[0][key]]}
+        # Every field any item has in any month, in order of first appearance
+        fields = dict.fromkeys(field for row in detailed for item in row[key] for field in item if field != 'name')
+        for field in fields:
+            nested[field] = [[item.get(field) for item in row[key]] for row in detailed]
+        columns[key] = nested
+    return columns
+
+
+def round_floats(value, precision):
+    """Round every float in a nested plan to precision decimal places"""
+    if isinstance(value, float):
+        return round(value, precision)
+    if isinstance(value, dict):
+        return {key: round_floats(item, precision) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [round_floats(item, precision) for item in value]
+    return value
+
+
+def wants_msgpack(accept):
+    """Whether an Accept header value prefers msgpack over JSON"""
+    for part in (accept or '').split(','):
+        media_type = part.split(';')[0].strip().lower()
+        if media_type in MSGPACK_TYPES:
+            return True
+        if media_type in ('application/json', '*/*'):
+            return False
+    return False
+
+
+def encode(result, as_msgpack=False, dumps=json.dumps):
+    """Serialize a shaped plan, returning (body, mimetype); msgpack is an optional dependency"""
+    if as_msgpack:
+        import msgpack as msgpack_module
+        return msgpack_module.packb(result, use_bin_type=True), MSGPACK_TYPES[0]
+    return dumps(result), 'application/json'
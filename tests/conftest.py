@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app runs from src/ (python main.py), so its modules import each other flat
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
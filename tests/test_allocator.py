@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from allocator import allocate, to_cents
+from models import AllocationRequest
+
+
+def random_request(rng):
+    targets = [
+        {
+            'name': 'Target {}'.format(i),
+            'minimum': round(float(rng.uniform(0, 50)), 2),
+            # Sub-cent caps are where rounding up would overshoot
+            'cap': None if rng.random() < 0.2 else round(float(rng.uniform(50, 400)), int(rng.integers(2, 5))),
+            'priority': int(rng.integers(1, 4)),
+            'weight': float(rng.choice([0.0, 0.5, 1.0, 2.0, 3.0])),
+            'enabled': bool(rng.random() < 0.9)
+        }
+        for i in range(int(rng.integers(1, 12)))
+    ]
+    debts = [
+        {
+            'name': 'Debt {}'.format(i),
+            'current_balance': round(float(rng.uniform(0, 500)), int(rng.integers(2, 5))),
+            'interest_rate': float(rng.choice([0.0, 6.5, 18.99, 24.0])),
+            'minimum_payment': round(float(rng.uniform(0, 40)), 2),
+            'priority': int(rng.integers(1, 4))
+        }
+        for i in range(int(rng.integers(0, 6)))
+    ]
+    amount = round(float(rng.uniform(0, 3000)), 2)
+    return AllocationRequest.parse({'amount': amount, 'targets': targets, 'debts': debts})
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_no_allocation_exceeds_its_cap(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        result = allocate(random_request(rng))
+        for allocation in result['allocations']:
+            if allocation['cap'] is not None:
+                assert allocation['amount'] <= allocation['cap'] + 1e-9, allocation
+        assert result['summary']['total_allocated'] <= result['summary']['available'] + 1e-9
+
+
+def test_leftover_cents_skip_targets_at_their_cap():
+    cents = to_cents(np.array([11.8249, 3.3333, 3.3333]), 18.49, np.array([11.825, np.inf, np.inf]))
+    assert cents.tolist() == [11.82, 3.34, 3.33]
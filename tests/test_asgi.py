@@ -0,0 +1,130 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import asgi
+import main
+
+PROFILE = {
+    'monthly_income': 4000,
+    'debts': [{'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90}],
+    'expenses': [{'category': 'housing', 'amount': 1500}]
+}
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    """A PlanDispatcher on threads instead of spawned processes"""
+    dispatcher = asgi.PlanDispatcher(workers=2, queue_size=8, timeout=10)
+    dispatcher._executor = ThreadPoolExecutor(2)
+    dispatcher.accepting = True
+    monkeypatch.setattr(asgi, 'dispatcher', dispatcher)
+    # The "workers" are this process, so their cache reports would count it twice
+    monkeypatch.setattr(main, '_worker_cache_stats', {})
+    yield dispatcher
+    dispatcher._executor.shutdown()
+
+
+def scope(path, method='POST', query=b'', headers=()):
+    return {
+        'type': 'http', 'path': path, 'method': method, 'query_string': query,
+        'headers': [(b'content-type', b'application/json')] + list(headers)
+    }
+
+
+def request(scope, body=b''):
+    """Run one request through asgi.app, returning (status, headers, body)"""
+    async def run():
+        # Created here so it belongs to this event loop
+        asgi.dispatcher._idle = asyncio.Event()
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi.app(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_only_non_streamed_plan_posts_are_pooled():
+    assert asgi.pooled(scope('/calculate-plan'))
+    assert asgi.pooled(scope('/sweep'))
+    assert not asgi.pooled(scope('/calculate-plan', query=b'stream=ndjson'))
+    assert not asgi.pooled(scope('/calculate-plan', headers=[(b'accept', b'application/x-ndjson')]))
+    assert not asgi.pooled(scope('/calculate-plan', method='GET'))
+    assert not asgi.pooled(scope('/cache-stats', method='GET'))
+
+
+def test_probes_are_answered_on_the_event_loop(dispatcher):
+    status, headers, body = request(scope('/healthz', 'GET'))
+    assert (status, json.loads(body)) == (200, {'status': 'ok'})
+    assert headers[b'access-control-allow-origin'] == b'*'
+    status, _, body = request(scope('/readyz', 'GET'))
+    assert status == (200 if json.loads(body)['ready'] else 503)
+
+
+def test_pooled_plan_is_served_and_counted(dispatcher):
+    status, headers, body = request(scope('/calculate-plan'), json.dumps(PROFILE).encode())
+    assert status == 200
+    assert headers[b'access-control-allow-origin'] == b'*'
+    assert headers[b'x-plan-cache'] in (b'hit', b'miss')
+    assert 'debt_strategies' in json.loads(body)
+    assert 'http_requests_total{endpoint="/calculate-plan",method="POST",status="200"}' in main.metrics.render()
+    assert main.cache_stats()['processes'] == 2
+
+
+def test_pooled_validation_errors_keep_their_fields(dispatcher):
+    status, _, body = request(scope('/sweep'), json.dumps({'debts': [{'name': 'Card'}]}).encode())
+    assert status == 400
+    assert set(json.loads(body)['fields']) == {
+        'debts[0].current_balance', 'debts[0].interest_rate', 'debts[0].minimum_payment'
+    }
+
+
+def test_full_queue_gets_429(dispatcher):
+    dispatcher.queue_size = 0
+    status, headers, _ = request(scope('/calculate-plan'), json.dumps(PROFILE).encode())
+    assert status == 429
+    assert headers[b'retry-after'] == b'1'
+    assert headers[b'access-control-allow-origin'] == b'*'
+
+
+def test_slow_plan_gets_504(dispatcher):
+    dispatcher.timeout = 0
+    status, _, body = request(scope('/calculate-plan'), json.dumps(PROFILE).encode())
+    assert status == 504
+    assert json.loads(body) == {'error': 'Plan timed out after 0s'}
+
+
+def test_oversized_body_gets_413(dispatcher):
+    status, _, body = request(scope('/calculate-plan'), b' ' * (asgi.MAX_BODY_BYTES + 1))
+    assert status == 413
+    assert json.loads(body)['limit_bytes'] == asgi.MAX_BODY_BYTES
+
+
+def test_shutting_down_gets_503(dispatcher):
+    dispatcher.accepting = False
+    status, headers, _ = request(scope('/calculate-plan'), json.dumps(PROFILE).encode())
+    assert status == 503
+    assert headers[b'connection'] == b'close'
+
+
+def test_batch_streams_every_item_in_order(dispatcher, monkeypatch):
+    monkeypatch.setattr(main, 'BATCH_CHUNKSIZE', 2)
+    profiles = [PROFILE] * 4 + [{'monthly_income': 'x'}]
+    status, headers, body = request(scope('/calculate-plan-batch'), json.dumps(profiles).encode())
+    assert status == 200
+    assert headers[b'content-type'] == b'application/x-ndjson'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2, 3, 4]
+    assert all('result' in line for line in lines[:4])
+    assert lines[4]['fields'] == {'monthly_income': 'must be a number'}
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from engine import simulate_payoff_batch, solve_payoff_events
+from main import planner
+from models import Debt
+
+
+def annuity_payment(balance, apr, months):
+    rate = apr / 100 / 12
+    return balance / months if rate == 0 else balance * rate / (1 - (1 + rate) ** -months)
+
+
+def random_batch(rng, rows, debts):
+    balances = rng.uniform(0, 30000, (rows, debts)).round(2)
+    rates = rng.choice([0.0, 3.5, 6.0, 12.0, 18.99, 24.0, 29.99], (rows, debts))
+    minimums = rng.uniform(0, 600, (rows, debts)).round(2)
+    # Exact annuity payments land a balance on zero in a whole month
+    exact = rng.random((rows, debts)) < 0.4
+    terms = rng.integers(1, 150, (rows, debts))
+    annuities = np.vectorize(annuity_payment)(balances, rates, terms)
+    minimums = np.where(exact, annuities, minimums)
+    extra = np.where(rng.random(rows) < 0.5, 0.0, rng.uniform(0, 1000, rows).round(2))
+    return balances, rates, minimums, extra
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_events_solver_matches_stepper(seed):
+    rng = np.random.default_rng(seed)
+    for debts in (1, 2, 5):
+        balances, rates, minimums, extra = random_batch(rng, 200, debts)
+        ordered = rng.random(len(extra)) < 0.5
+        stepped = simulate_payoff_batch(balances, rates, minimums, extra, 240, ordered)
+        solved = solve_payoff_events(balances, rates, minimums, extra, 240, ordered)
+        np.testing.assert_array_equal(solved[0], stepped[0])
+        np.testing.assert_allclose(solved[1], stepped[1], rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize('balance, apr, months', [(12000, 6.0, 120), (250000, 0.0, 60), (5000, 18.99, 36)])
+def test_exact_annuity_pays_off_on_its_last_month(balance, apr, months):
+    payment = annuity_payment(balance, apr, months)
+    for solve in (simulate_payoff_batch, solve_payoff_events):
+        payoff_months, _ = solve([[balance]], [[apr]], [[payment]], [0], 600)
+        assert payoff_months[0] == months
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batch_engines_match_reference_stepper(seed):
+    rng = np.random.default_rng(100 + seed)
+    for _ in range(40):
+        balances, rates, minimums, extra = random_batch(rng, 1, int(rng.integers(1, 6)))
+        debts = [
+            Debt('Debt {}'.format(i), balance, rate, minimum, balance, 3, False)
+            for i, (balance, rate, minimum) in enumerate(zip(balances[0], rates[0], minimums[0]))
+        ]
+        for strategy in ('avalanche', 'equal'):
+            reference = planner.simulate_debt_payoff(debts, 0, float(extra[0]), strategy, 240)
+            for solve in (simulate_payoff_batch, solve_payoff_events):
+                months, total_interest = solve(balances, rates, minimums, extra, 240, strategy != 'equal')
+                assert months[0] == reference['months_to_payoff']
+                assert round(float(total_interest[0]), 2) == pytest.approx(reference['total_interest'], abs=0.011)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_avalanche_spends_the_optimizer_budget(seed):
+    # With one priority tier and nothing diverted to savings, the optimal plan is the avalanche
+    rng = np.random.default_rng(200 + seed)
+    for _ in range(20):
+        balances, rates, minimums, extra = random_batch(rng, 1, int(rng.integers(1, 6)))
+        debts = [
+            Debt('Debt {}'.format(i), balance, rate, minimum, balance, 3, False)
+            for i, (balance, rate, minimum) in enumerate(zip(balances[0], rates[0], minimums[0]))
+        ]
+        strategies = planner.calculate_debt_strategies(0, debts, float(extra[0]), max_months=240)
+        assert strategies['avalanche']['months_to_payoff'] == strategies['optimal']['months_to_payoff']
+        assert strategies['avalanche']['total_interest'] == pytest.approx(strategies['optimal']['total_interest'], abs=0.011)
+
+
+def test_small_profiles_take_the_scalar_path_with_the_same_results(monkeypatch):
+    import main
+
+    rng = np.random.default_rng(300)
+    balances, rates, minimums, extra = random_batch(rng, 1, 5)
+    debts = [
+        Debt('Debt {}'.format(i), balance, rate, minimum, balance, 3, False)
+        for i, (balance, rate, minimum) in enumerate(zip(balances[0], rates[0], minimums[0]))
+    ]
+    orderings = [('avalanche', debts, 'avalanche'), ('equal_payment', debts, 'equal')]
+    # Negative available funds (expenses above income) mean no extra, but paid-off minimums still roll over
+    for available_funds in (float(extra[0]), -500.0):
+        monkeypatch.setattr(main, 'SCALAR_PAYOFF_MAX_DEBTS', 24)
+        scalar = planner.simulate_debt_payoff_batch(orderings, available_funds, max_months=240)
+        monkeypatch.setattr(main, 'SCALAR_PAYOFF_MAX_DEBTS', 0)
+        for solver in ('stepper', 'events'):
+            batched = planner.simulate_debt_payoff_batch(orderings, available_funds, solver, 240)
+            for key in scalar:
+                assert batched[key]['months_to_payoff'] == scalar[key]['months_to_payoff']
+                assert batched[key]['total_interest'] == pytest.approx(scalar[key]['total_interest'], abs=0.011)
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from main import app
+from models import (
+    MAX_AMOUNT, MAX_DEBTS, MAX_EXPENSES, MAX_GOALS, MAX_INTEREST_RATE, AllocationRequest, FinancialProfile,
+    ValidationError
+)
+
+
+def debt(**fields):
+    return dict({'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90}, **fields)
+
+
+@pytest.mark.parametrize('field, value', [
+    ('current_balance', 1e308), ('minimum_payment', MAX_AMOUNT * 2), ('interest_rate', MAX_INTEREST_RATE + 1)
+])
+def test_out_of_range_debt_fields_are_rejected(field, value):
+    with pytest.raises(ValidationError) as error:
+        FinancialProfile.parse({'debts': [debt(**{field: value})]})
+    assert list(error.value.errors) == ['debts[0].' + field]
+
+
+def test_huge_amounts_get_a_field_level_400():
+    response = app.test_client().post('/calculate-plan', json={
+        'monthly_income': 1e308,
+        'debts': [debt(current_balance=1e308)],
+        'expenses': [{'category': 'housing', 'amount': 1e308}]
+    })
+    assert response.status_code == 400
+    assert set(response.get_json()['fields']) == {
+        'monthly_income', 'debts[0].current_balance', 'expenses[0].amount'
+    }
+
+
+def parse_errors(data):
+    with pytest.raises(ValidationError) as error:
+        FinancialProfile.parse(data)
+    return error.value.errors
+
+
+def test_missing_debt_fields_are_required():
+    assert parse_errors({'debts': [{'name': 'Card'}]}) == {
+        'debts[0].current_balance': 'is required',
+        'debts[0].interest_rate': 'is required',
+        'debts[0].minimum_payment': 'is required'
+    }
+
+
+@pytest.mark.parametrize('data, path, message', [
+    ('not an object', '', 'must be a JSON object'),
+    ({'monthly_income': 'x'}, 'monthly_income', 'must be a number'),
+    ({'monthly_income': True}, 'monthly_income', 'must be a number'),
+    ({'monthly_income': 'NaN'}, 'monthly_income', 'must be a finite number'),
+    ({'debts': {}}, 'debts', 'must be a list'),
+    ({'debts': ['Card']}, 'debts[0]', 'must be an object'),
+    ({'debts': [debt(variable_rate='yes')]}, 'debts[0].variable_rate', 'must be true or false'),
+    ({'projection_months': 1.5}, 'projection_months', 'must be a whole number'),
+    ({'payoff_solver': 'fastest'}, 'payoff_solver', None),
+    ({'income_changes': [{'type': 'bonus', 'amount': 100, 'start_month': 1}]}, 'income_changes[0].type', None)
+])
+def test_wrong_types_are_reported_on_their_field(data, path, message):
+    errors = parse_errors(data)
+    assert path in errors
+    if message is not None:
+        assert errors[path] == message
+
+
+@pytest.mark.parametrize('data, path', [
+    ({'monthly_income': -1}, 'monthly_income'),
+    ({'debts': [debt(current_balance=-5)]}, 'debts[0].current_balance'),
+    ({'debts': [debt(minimum_payment=-5)]}, 'debts[0].minimum_payment'),
+    ({'expenses': [{'category': 'housing', 'amount': -10}]}, 'expenses[0].amount'),
+    ({'goals': [{'name': 'Trip', 'target_amount': -1}]}, 'goals[0].target_amount'),
+    ({'income_changes': [{'type': 'percentage', 'amount': -150, 'start_month': 1}]}, 'income_changes[0].amount'),
+    ({'income_changes': [{'type': 'fixed', 'amount': 100, 'start_month': 0}]}, 'income_changes[0].start_month')
+])
+def test_negatives_are_rejected(data, path):
+    assert path in parse_errors(data)
+
+
+def test_blank_form_inputs_take_the_default():
+    profile = FinancialProfile.parse({'monthly_income': '', 'current_savings': None, 'projection_months': ''})
+    assert (profile.monthly_income, profile.current_savings, profile.projection_months) == (0.0, 0.0, 12)
+
+
+@pytest.mark.parametrize('field, limit', [('debts', MAX_DEBTS), ('expenses', MAX_EXPENSES), ('goals', MAX_GOALS)])
+def test_list_caps(field, limit):
+    item = {'debts': debt(), 'expenses': {'category': 'other', 'amount': 1}, 'goals': {'name': 'Goal'}}[field]
+    assert parse_errors({field: [item] * (limit + 1)}) == {
+        field: 'has {} items, at most {} allowed'.format(limit + 1, limit)
+    }
+
+
+def test_every_bad_field_is_reported_at_once():
+    errors = parse_errors({
+        'monthly_income': 'lots',
+        'debts': [debt(), debt(interest_rate='high')],
+        'goals': [{'name': 'Trip', 'target_month': 0}]
+    })
+    assert set(errors) == {'monthly_income', 'debts[1].interest_rate', 'goals[0].target_month'}
+
+
+@pytest.mark.parametrize('route', ['/calculate-plan', '/monte-carlo', '/sweep'])
+def test_routes_answer_bad_fields_with_a_field_level_400(route):
+    body = {'debts': [debt(current_balance='x')], 'sweep': {'parameters': [{'name': 'extra_funds', 'values': [0]}]}}
+    response = app.test_client().post(route, json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {
+        'error': 'Invalid financial data', 'fields': {'debts[0].current_balance': 'must be a number'}
+    }
+
+
+def test_batch_reports_bad_profiles_per_item():
+    response = app.test_client().post('/calculate-plan-batch', json=[
+        {'monthly_income': 4000}, {'debts': [debt(current_balance='x')]}
+    ])
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert 'result' in lines[0]
+    assert lines[1] == {
+        'index': 1, 'error': 'Invalid financial data', 'fields': {'debts[0].current_balance': 'must be a number'}
+    }
+
+
+def test_allocation_needs_a_target_or_debt():
+    with pytest.raises(ValidationError) as error:
+        AllocationRequest.parse({'amount': 100})
+    assert error.value.errors == {'targets': 'needs at least one target or debt'}
+
+
+def test_allocation_cap_below_minimum_is_rejected():
+    with pytest.raises(ValidationError) as error:
+        AllocationRequest.parse({'amount': 100, 'targets': [{'name': 'Rent', 'minimum': 50, 'cap': 10}]})
+    assert error.value.errors == {'targets[0].cap': 'must be at least the minimum'}
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from main import app
+from models import FinancialProfile, MonteCarloSettings
+from montecarlo import CHUNK_PATHS, run_monte_carlo
+
+PROFILE = {
+    'monthly_income': 4000,
+    'current_savings': 1000,
+    'debts': [
+        {'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90, 'variable_rate': True},
+        {'name': 'Car', 'current_balance': 12000, 'interest_rate': 6.5, 'minimum_payment': 280}
+    ],
+    'expenses': [{'category': 'housing', 'amount': 1500}],
+    'goals': [{'name': 'Buffer', 'type': 'savings', 'target_amount': 5000, 'target_month': 6}]
+}
+
+
+def simulate(**simulation):
+    return run_monte_carlo(FinancialProfile.parse(PROFILE), MonteCarloSettings.parse(simulation))
+
+
+def test_without_randomness_every_band_is_the_deterministic_path():
+    result = simulate(paths=300, months=3, seed=1, income_volatility=0, shock_probability=0, rate_volatility=0)
+    for bands in result['bands'].values():
+        assert bands['p10'] == bands['p50'] == bands['p90']
+    assert result['bands']['total_debt_remaining']['p50'][0] < 15000
+    assert result['goals'][0]['on_track_probability'] in (0.0, 1.0)
+
+
+def test_bands_are_ordered_and_reproducible_from_the_seed():
+    result = simulate(paths=CHUNK_PATHS + 500, months=12, seed=7)
+    assert result == simulate(paths=CHUNK_PATHS + 500, months=12, seed=7)
+    for bands in result['bands'].values():
+        for p10, p50, p90 in zip(bands['p10'], bands['p50'], bands['p90']):
+            assert p10 <= p50 <= p90
+    assert 0 <= result['goals'][0]['on_track_probability'] <= 1
+
+
+def test_chunks_spread_over_workers_give_the_serial_result():
+    profile = FinancialProfile.parse(PROFILE)
+    settings = MonteCarloSettings.parse({'paths': 3 * CHUNK_PATHS, 'months': 6, 'seed': 3, 'workers': 2})
+    with ThreadPoolExecutor(2) as executor:
+        assert run_monte_carlo(profile, settings, executor) == run_monte_carlo(profile, settings)
+
+
+def test_route_runs_the_simulation():
+    response = app.test_client().post('/monte-carlo', json={
+        **PROFILE, 'simulation': {'paths': 200, 'months': 4, 'seed': 1}
+    })
+    assert response.status_code == 200
+    assert response.get_json()['paths'] == 200
+    assert len(response.get_json()['bands']['current_balance']['p50']) == 4
@@ -0,0 +1,81 @@
+import pytest
+
+from main import planner
+from models import MAX_PROJECTION_CELLS, FinancialProfile, ValidationError
+from plan_cache import MemoryBackend, PlanCache, SectionMemo
+
+
+def profile(debts, goals, months, detail_months=None):
+    return FinancialProfile.parse({
+        'monthly_income': 5000,
+        'debts': [
+            {'name': 'Debt {}'.format(i), 'current_balance': 1000, 'interest_rate': 12, 'minimum_payment': 30}
+            for i in range(debts)
+        ],
+        'goals': [{'name': 'Goal {}'.format(i), 'target_amount': 1000} for i in range(goals)],
+        'projection_months': months,
+        'projection_detail_months': detail_months
+    })
+
+
+def test_projection_cells_are_bounded():
+    with pytest.raises(ValidationError) as error:
+        profile(500, 100, 480)
+    assert 'projection_months' in error.value.errors
+    assert profile(400, 100, MAX_PROJECTION_CELLS // 501)
+    # Months without the per-debt breakdown cost one cell each
+    assert profile(60, 0, 480, detail_months=0).projection_cells() == 480
+    assert profile(500, 100, 480, detail_months=39)
+
+
+def test_projection_cells_count_only_detailed_months():
+    assert profile(3, 1, 24).projection_cells() == 24 + 24 * 4
+    assert profile(3, 1, 24, detail_months=6).projection_cells() == 24 + 6 * 4
+
+
+def test_memory_backend_evicts_by_cost():
+    backend = MemoryBackend(max_entries=10, ttl=0, max_cost=100)
+    backend.set('a', 1, cost=60)
+    backend.set('b', 2, cost=30)
+    backend.set('c', 3, cost=30)
+    assert backend.get('a') is None and backend.get('b') == 2 and backend.get('c') == 3
+    assert backend.cost == 60
+    backend.set('big', 4, cost=101)
+    assert backend.get('big') is None and backend.cost == 60
+
+
+def test_oversized_plans_are_computed_but_not_cached():
+    cache = PlanCache(MemoryBackend(max_entries=10, ttl=0, max_cost=200))
+    small, large = profile(2, 0, 12), profile(20, 0, 12)
+    for _ in range(2):
+        cache.get_or_compute(small, lambda p: {'plan': 'small'})
+        cache.get_or_compute(large, lambda p: {'plan': 'large'})
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.backend.size() == 1
+
+
+def test_section_memo_recomputes_only_the_sections_whose_inputs_changed(monkeypatch):
+    monkeypatch.setattr(planner, 'section_memo', SectionMemo())
+    data = {
+        'monthly_income': 5000,
+        'debts': [{'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90}],
+        'goals': [{'name': 'Trip', 'target_amount': 2000, 'target_month': 6}]
+    }
+    first = planner.calculate_comprehensive_plan(FinancialProfile.parse(data))
+    assert first['memo']['memo'] == []
+
+    data['goals'][0]['target_amount'] = 2500
+    second = planner.calculate_comprehensive_plan(FinancialProfile.parse(data))
+    assert set(second['memo']['computed']) == {'goal_progress', 'recommendations'}
+    assert set(second['memo']['memo']) == {'projection', 'debt_strategies', 'health_score'}
+    assert second['debt_strategies'] == first['debt_strategies']
+
+
+def test_section_memo_does_not_keep_sections_over_its_cell_budget():
+    memo = SectionMemo(max_entries=4, max_cost=10)
+    trace = {'memo': [], 'computed': []}
+    for _ in range(2):
+        memo.compute('projection', ('large',), lambda: 'large', trace, cost=11)
+        memo.compute('projection', ('small',), lambda: 'small', trace, cost=5)
+    assert trace['computed'] == ['projection', 'projection', 'projection']
+    assert trace['memo'] == ['projection']
@@ -0,0 +1,39 @@
+from main import planner
+from models import FinancialProfile
+from plan_cache import SQLiteBackend
+from plan_store import PlanStore
+
+PROFILE = {
+    'monthly_income': 5000,
+    'debts': [
+        {'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90, 'priority': 'high'},
+        {'name': 'Car', 'current_balance': 12000, 'interest_rate': 6.5, 'minimum_payment': 280}
+    ],
+    'expenses': [{'category': 'housing', 'amount': 1500}]
+}
+
+
+def test_new_database_saves_and_loads_a_plan(tmp_path):
+    store = PlanStore(str(tmp_path / 'plans.db'))
+    profile = FinancialProfile.parse(PROFILE)
+    result = planner.calculate_comprehensive_plan(profile)
+    result.pop('memo')
+
+    plan_id, result_id = store.save_plan(profile, result, 'Mine')
+    plan = store.load_plan(plan_id)
+    assert plan['name'] == 'Mine'
+    assert FinancialProfile.parse(plan['profile']) == profile
+    assert plan['history'][0]['id'] == result_id
+    assert plan['result']['projection'] == result['projection']
+    assert plan['result']['debt_strategies'] == result['debt_strategies']
+    assert [row['id'] for row in store.list_plans()] == [plan_id]
+    store.close()
+
+
+def test_new_database_backs_the_sqlite_plan_cache(tmp_path):
+    store = PlanStore(str(tmp_path / 'plans.db'))
+    backend = SQLiteBackend(store)
+    backend.set('key', {'summary': {'total_debt': 1}})
+    assert backend.get('key') == {'summary': {'total_debt': 1}}
+    assert backend.size() == 1
+    store.close()
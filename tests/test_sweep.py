@@ -0,0 +1,62 @@
+import pytest
+
+from main import app, planner
+from models import FinancialProfile, SweepSettings, ValidationError
+from sweep import run_sweep
+
+PROFILE = {
+    'monthly_income': 5000,
+    'debts': [
+        {'name': 'Card', 'current_balance': 8000, 'interest_rate': 22.9, 'minimum_payment': 200},
+        {'name': 'Car', 'current_balance': 15000, 'interest_rate': 6.5, 'minimum_payment': 350}
+    ],
+    'expenses': [{'category': 'housing', 'amount': 3500}],
+    'income_changes': [{'type': 'fixed', 'amount': 500, 'start_month': 12}]
+}
+
+
+def sweep(parameters, strategy='equal_payment', profile=PROFILE):
+    parsed = FinancialProfile.parse(profile)
+    return run_sweep(parsed, SweepSettings.parse({'strategy': strategy, 'parameters': parameters}, parsed))
+
+
+def test_grid_follows_the_parameter_values():
+    result = sweep([
+        {'name': 'extra_funds', 'start': 0, 'stop': 300, 'step': 100},
+        {'name': 'income_changes[0].start_month', 'values': [1, 12, 24]}
+    ])
+    assert result['parameters'] == [
+        {'name': 'extra_funds', 'values': [0, 100, 200, 300]},
+        {'name': 'income_changes[0].start_month', 'values': [1, 12, 24]}
+    ]
+    months = result['months_to_payoff']
+    assert len(months) == 4 and all(len(row) == 3 for row in months)
+    # More money sooner never takes longer
+    for row in months:
+        assert row == sorted(row)
+    for column in zip(*months):
+        assert list(column) == sorted(column, reverse=True)
+
+
+@pytest.mark.parametrize('strategy, key', [('equal_payment', 'equal_payment'), ('optimal', 'optimal')])
+def test_a_cell_without_changes_matches_the_plan(strategy, key):
+    profile = {key: value for key, value in PROFILE.items() if key != 'income_changes'}
+    result = sweep([{'name': 'extra_funds', 'values': [0]}], strategy, profile)
+    plan = planner.calculate_comprehensive_plan(FinancialProfile.parse(profile))
+    assert result['months_to_payoff'] == [plan['debt_strategies'][key]['months_to_payoff']]
+    assert result['total_interest'] == [pytest.approx(plan['debt_strategies'][key]['total_interest'], abs=0.011)]
+
+
+def test_parameters_must_name_an_existing_item():
+    with pytest.raises(ValidationError) as error:
+        sweep([{'name': 'debts[5].interest_rate', 'values': [5]}])
+    assert error.value.errors == {'sweep.parameters[0].name': 'refers to a missing item (the request has 2)'}
+
+
+def test_route_runs_the_sweep():
+    response = app.test_client().post('/sweep', json={
+        **PROFILE, 'sweep': {'parameters': [{'name': 'debts[0].interest_rate', 'values': [10, 20]}]}
+    })
+    assert response.status_code == 200
+    assert response.get_json()['strategy'] == 'optimal'
+    assert len(response.get_json()['months_to_payoff']) == 2
@@ -0,0 +1,48 @@
+from main import app
+from wire import columnar_projection
+
+PROFILE = {
+    'monthly_income': 4000,
+    'debts': [
+        {'name': 'Card', 'current_balance': 3000, 'interest_rate': 22.9, 'minimum_payment': 90},
+        {'name': 'Car', 'current_balance': 12000, 'interest_rate': 6.5, 'minimum_payment': 280}
+    ],
+    'expenses': [{'category': 'housing', 'amount': 1500}],
+    'goals': [{'name': 'Buffer', 'type': 'savings', 'target_amount': 2000, 'target_month': 6}],
+    # Income drops below the minimums from month 4, so those months take the shortfall path
+    'income_changes': [{'type': 'fixed', 'amount': -2300, 'start_month': 4}],
+    'projection_months': 6,
+    'payoff_solver': 'stepper'
+}
+
+
+def test_shortfall_months_report_every_payment_field():
+    plan = app.test_client().post('/calculate-plan', json=PROFILE).get_json()
+    assert {frozenset(payment) for month in plan['projection'] for payment in month['debt_payments']} == {
+        frozenset(('name', 'amount', 'principal', 'interest'))
+    }
+
+
+def test_columnar_nested_fields_are_month_by_item_matrices():
+    response = app.test_client().post('/calculate-plan?layout=columnar', json=PROFILE)
+    assert response.status_code == 200
+    payments = response.get_json()['projection']['debt_payments']
+    assert payments['month'] == [1, 2, 3, 4, 5, 6]
+    assert payments['name'] == ['Card', 'Car']
+    for field in ('amount', 'principal', 'interest'):
+        assert len(payments[field]) == 6
+        assert all(len(row) == 2 and None not in row for row in payments[field])
+
+
+def test_columnar_keeps_fields_that_only_some_items_have():
+    rows = [
+        {'month': 1, 'debt_payments': [{'name': 'A', 'amount': 1.0}, {'name': 'B', 'amount': 2.0, 'interest': 0.5}]},
+        {'month': 2, 'debt_payments': [{'name': 'A', 'amount': 1.0}, {'name': 'B', 'amount': 2.0}]}
+    ]
+    payments = columnar_projection(rows)['debt_payments']
+    assert payments == {
+        'month': [1, 2],
+        'name': ['A', 'B'],
+        'amount': [[1.0, 2.0], [1.0, 2.0]],
+        'interest': [[None, 0.5], [None, None]]
+    }